@@ -0,0 +1,99 @@
+"""
+Measures the cold-start import cost of each Lambda handler module.
+
+Every handler is imported in a fresh interpreter (the same thing a Lambda cold
+start does before the first request), with the interpreter's own start-up time
+subtracted. `-X importtime` is used to list the slowest imports.
+
+Usage:
+    python benchmarks/cold_start.py [--repeat 5] [--max-ms 1500]
+
+With --max-ms the script exits non-zero if any handler exceeds the budget,
+so it can be used to catch import-time regressions.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Handler name -> directory that is zipped and deployed as the Lambda package
+HANDLERS = {
+    "grid-detection": REPO_ROOT / "grid-detection" / "lambda_function",
+    "clue-extraction": REPO_ROOT / "clue-extraction",
+    "solver": REPO_ROOT / "solver",
+    "pipeline": REPO_ROOT / "pipeline",
+}
+
+
+def time_import(handler_dir, statement):
+    """Run `statement` in a fresh interpreter inside handler_dir and return (seconds, stderr)."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=handler_dir,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return elapsed, proc.stderr
+
+
+def slowest_imports(importtime_log, module="lambda_function", top=5):
+    """
+    Parse `-X importtime` output into the modules imported directly by `module`,
+    sorted by cumulative cost.
+    """
+    # Children are logged before their parent, indented two spaces per level
+    children = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                return sorted(children, reverse=True)[:top]
+            children = []
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the cold-start import cost of each Lambda handler.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per handler (default: 5)")
+    parser.add_argument("--max-ms", type=float, help="Fail if any handler's median import time exceeds this")
+    args = parser.parse_args(argv)
+
+    baseline = statistics.median(
+        time_import(REPO_ROOT, "pass")[0] for _ in range(args.repeat)
+    )
+    print(f"Interpreter start-up: {baseline * 1000:.1f} ms (subtracted below)\n")
+
+    failed = False
+    for name, handler_dir in HANDLERS.items():
+        try:
+            runs = [time_import(handler_dir, "import lambda_function") for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:16s} import failed: {e}")
+            failed = True
+            continue
+
+        median_ms = (statistics.median(t for t, _ in runs) - baseline) * 1000
+        over_budget = args.max_ms is not None and median_ms > args.max_ms
+        failed = failed or over_budget
+        print(f"{name:16s} {median_ms:8.1f} ms{'  OVER BUDGET' if over_budget else ''}")
+        for cumulative_us, module in slowest_imports(runs[-1][1]):
+            print(f"    {cumulative_us / 1000:8.1f} ms  {module}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Compares decode time and peak memory of the grid-detection pipeline for the
+image decode modes it could use.
+
+Each mode runs in a fresh interpreter so its peak resident set size
+(ru_maxrss) is not inflated by an earlier run. "color" is the previous
+IMREAD_COLOR + cvtColor path, "gray" the IMREAD_GRAYSCALE path the Lambda uses.
+
+Usage:
+    python benchmarks/decode_memory.py [image] [--repeat 5] [--pyramid-levels 2]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+GRID_DIR = REPO_ROOT / "grid-detection" / "lambda_function"
+DEFAULT_IMAGE = REPO_ROOT / "manual-test-set" / "daily-1997-05-May2997.png"
+
+MODES = ["color", "gray"]
+
+# Runs inside the child interpreter; prints one JSON line
+WORKER = """
+import json, resource, sys, time
+import cv2, numpy as np
+from grid_detect import get_crossword_grid_array
+
+path, mode, levels, repeat = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+with open(path, "rb") as f:
+    img_bytes = f.read()
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+decode, total = [], []
+for _ in range(repeat):
+    t0 = time.perf_counter()
+    np_arr = np.frombuffer(img_bytes, np.uint8)
+    if mode == "gray":
+        image = cv2.imdecode(np_arr, cv2.IMREAD_GRAYSCALE)
+    else:
+        image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+    t1 = time.perf_counter()
+    grid, *_ = get_crossword_grid_array(image, pyramid_levels=levels)
+    decode.append(t1 - t0)
+    total.append(time.perf_counter() - t0)
+    del image
+
+print(json.dumps({
+    "decode": decode,
+    "total": total,
+    "shape": list(grid.shape),
+    "peak_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024,
+}))
+"""
+
+
+def run_mode(image, mode, levels, repeat):
+    proc = subprocess.run(
+        [sys.executable, "-c", WORKER, str(image), mode, str(levels), str(repeat)],
+        cwd=GRID_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    # grid_detect prints progress; the result is the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare decode time and peak memory per decode mode.")
+    parser.add_argument("image", nargs="?", default=str(DEFAULT_IMAGE))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pyramid-levels", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':6s} {'decode ms':>10s} {'total ms':>10s} {'peak MB':>9s}  grid")
+    for mode in MODES:
+        r = run_mode(args.image, mode, args.pyramid_levels, args.repeat)
+        print(f"{mode:6s} {statistics.median(r['decode']) * 1000:10.1f} "
+              f"{statistics.median(r['total']) * 1000:10.1f} {r['peak_mb']:9.1f}  "
+              f"{r['shape'][0]}x{r['shape'][1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
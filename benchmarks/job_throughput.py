@@ -0,0 +1,80 @@
+"""
+Load-tests the asynchronous job runner offline.
+
+Jobs run a synthetic handler that sleeps for --job-ms (standing in for the
+Bedrock and Textract waits that dominate a real solve) while emitting
+--events progress events, so the numbers show the overhead of the queue,
+the store and progress writes rather than of the handlers. Every queue/store
+combination is run with the same jobs and reports throughput and latency.
+
+Usage:
+    python benchmarks/job_throughput.py [--jobs 200] [--workers 8] [--job-ms 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "pipeline"))
+from jobs import JobRunner, open_queue, open_store
+
+
+def synthetic_handler(job_ms, events):
+    def handler(payload, report):
+        for n in range(events):
+            time.sleep(job_ms / 1000 / max(1, events))
+            report({"event": "slot", "stage": "solve", "number": n})
+        return {"echo": payload["n"]}
+    return handler
+
+
+def percentiles(values):
+    p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+    return f"p50 {p50:7.1f}  p90 {p90:7.1f}  p99 {p99:7.1f} ms"
+
+
+def run(store_spec, queue_spec, args):
+    runner = JobRunner(open_store(store_spec), open_queue(queue_spec),
+                       handlers={"synthetic": synthetic_handler(args.job_ms, args.events)},
+                       workers=args.workers, progress_interval=args.progress_interval)
+    start = time.perf_counter()
+    with runner:
+        job_ids = [runner.submit({"n": n}, kind="synthetic") for n in range(args.jobs)]
+        submitted = time.perf_counter() - start
+        records = [runner.wait(job_id, poll_interval=0.01) for job_id in job_ids]
+    elapsed = time.perf_counter() - start
+
+    failed = sum(record["status"] != "succeeded" for record in records)
+    queued = [record["started_at"] - record["submitted_at"] for record in records]
+    total = [record["finished_at"] - record["submitted_at"] for record in records]
+    print(f"{queue_spec.split(':')[0]:>6} queue, {store_spec.split(':')[0]:>6} store: "
+          f"{args.jobs / elapsed:7.1f} jobs/s, submit {1000 * submitted / args.jobs:.2f} ms/job, {failed} failed")
+    print(f"    queue wait  {percentiles(queued)}")
+    print(f"    end to end  {percentiles(total)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure job runner throughput with a synthetic handler.")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--job-ms", type=float, default=50.0, help="Time each synthetic job takes")
+    parser.add_argument("--events", type=int, default=5, help="Progress events per job")
+    parser.add_argument("--progress-interval", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    ideal = args.workers * 1000 / args.job_ms
+    print(f"{args.jobs} jobs of {args.job_ms:.0f} ms on {args.workers} workers (ideal {ideal:.1f} jobs/s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "jobs.db")
+        for store_spec, queue_spec in (("memory", "memory"), (f"sqlite:{db}", "memory"),
+                                       (f"sqlite:{db}", f"sqlite:{db}")):
+            run(store_spec, queue_spec, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
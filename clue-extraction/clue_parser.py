@@ -0,0 +1 @@
+../shared/clue_parser.py
\ No newline at end of file
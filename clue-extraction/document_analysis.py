@@ -0,0 +1,130 @@
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# GetDocumentAnalysis returns at most 1000 blocks per call
+PAGE_SIZE = 1000
+
+def start_analysis(client, bucket, key, feature_types):
+    """Start an asynchronous Textract job for a (multi-page) document in S3 and return its JobId."""
+    response = client.start_document_analysis(
+        DocumentLocation={"S3Object": {"Bucket": bucket, "Name": key}},
+        FeatureTypes=feature_types
+    )
+    return response["JobId"]
+
+class AnalysisPending(Exception):
+    """Raised when a Textract job is still running at the caller's deadline; poll again with job_id."""
+
+    def __init__(self, job_id):
+        super().__init__(f"Textract job {job_id} is still running")
+        self.job_id = job_id
+
+def wait_for_job(client, job_id, poll_interval=2.0, deadline=None):
+    """
+    Poll a Textract analysis job until it finishes.
+
+    Args:
+        deadline: Optional time.monotonic() value; polling stops before a
+            sleep would pass it.
+
+    Returns:
+        dict: The first GetDocumentAnalysis result page.
+
+    Raises:
+        AnalysisPending: If the job is still running at the deadline.
+        RuntimeError: If the job failed.
+    """
+    while True:
+        response = client.get_document_analysis(JobId=job_id, MaxResults=PAGE_SIZE)
+        status = response["JobStatus"]
+        if status == "IN_PROGRESS":
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                raise AnalysisPending(job_id)
+            time.sleep(poll_interval)
+            continue
+        if status == "FAILED":
+            raise RuntimeError(f"Textract job {job_id} failed: {response.get('StatusMessage', '')}")
+        # SUCCEEDED or PARTIAL_SUCCESS
+        return response
+
+def iter_job_blocks(client, job_id, poll_interval=2.0, deadline=None):
+    """
+    Wait for a Textract analysis job, then yield its Blocks one result page at a time,
+    so nothing downstream waits for (or holds) the whole document.
+
+    The wait happens on the first next() call; see wait_for_job for the
+    exceptions it raises.
+    """
+    response = wait_for_job(client, job_id, poll_interval, deadline)
+    while True:
+        yield from response.get("Blocks", [])
+        if "NextToken" not in response:
+            return
+        response = client.get_document_analysis(JobId=job_id, MaxResults=PAGE_SIZE,
+                                                NextToken=response["NextToken"])
+
+def iter_pages(blocks):
+    """
+    Group a stream of Blocks by page and yield (page_number, blocks) as soon as
+    the stream moves on to a later page.
+
+    Textract returns blocks in page order; a block for a page that has already
+    been yielded is reported and dropped rather than held back indefinitely.
+    """
+    current, buffer = None, []
+    done = set()
+    for block in blocks:
+        page = block.get("Page", 1)
+        if page == current:
+            buffer.append(block)
+            continue
+        if page in done:
+            logger.warning("Dropping out-of-order %s block for page %s", block["BlockType"], page)
+            continue
+        if current is not None:
+            done.add(current)
+            yield current, buffer
+        current, buffer = page, [block]
+    if current is not None:
+        yield current, buffer
+
+class LocalTextract:
+    """
+    In-memory stand-in for the Textract async API, for running the multi-page
+    path without AWS.
+
+    Args:
+        documents: {(bucket, key): Blocks} as returned by a real job.
+        polls_in_progress: Number of GetDocumentAnalysis calls that report IN_PROGRESS.
+    """
+
+    def __init__(self, documents, polls_in_progress=1):
+        self.documents = documents
+        self.polls_in_progress = polls_in_progress
+        self.calls = []
+        self._jobs = {}
+        self._ids = itertools.count(1)
+
+    def start_document_analysis(self, DocumentLocation, FeatureTypes, **kwargs):
+        s3 = DocumentLocation["S3Object"]
+        job_id = f"local-{next(self._ids)}"
+        self._jobs[job_id] = {"blocks": self.documents[(s3["Bucket"], s3["Name"])],
+                              "polls": self.polls_in_progress}
+        self.calls.append(("start", job_id))
+        return {"JobId": job_id}
+
+    def get_document_analysis(self, JobId, MaxResults=PAGE_SIZE, NextToken=None):
+        job = self._jobs[JobId]
+        self.calls.append(("get", JobId, NextToken))
+        if job["polls"] > 0:
+            job["polls"] -= 1
+            return {"JobStatus": "IN_PROGRESS"}
+        start = int(NextToken or 0)
+        end = start + MaxResults
+        response = {"JobStatus": "SUCCEEDED", "Blocks": job["blocks"][start:end]}
+        if end < len(job["blocks"]):
+            response["NextToken"] = str(end)
+        return response
@@ -0,0 +1,79 @@
+import io
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError
+from PIL import Image
+
+# PNG/GIF/BMP carry their size in the first few dozen bytes; JPEG puts it in the
+# SOF marker after any EXIF/ICC segments, which is almost always within 64 KiB
+PROBE_BYTES = 64 * 1024
+
+class ImageSizeCache:
+    """
+    Reads image dimensions from S3 with a ranged GET of the file header,
+    cached by (bucket, key, ETag).
+
+    A repeated lookup sends a conditional request (If-None-Match) for the last
+    seen ETag, so an unchanged object costs a 304 with no body at all.
+    """
+
+    def __init__(self, client_factory, max_entries=256, probe_bytes=PROBE_BYTES):
+        self._client_factory = client_factory
+        self.max_entries = max_entries
+        self.probe_bytes = probe_bytes
+        self._sizes = OrderedDict()  # (bucket, key, etag) -> (width, height)
+        self._etags = {}             # (bucket, key) -> last seen etag
+        self._lock = threading.Lock()
+
+    def _cached(self, bucket, key):
+        with self._lock:
+            etag = self._etags.get((bucket, key))
+            size = self._sizes.get((bucket, key, etag))
+            if size is not None:
+                self._sizes.move_to_end((bucket, key, etag))
+            return etag, size
+
+    def _remember(self, bucket, key, etag, size):
+        with self._lock:
+            self._etags[(bucket, key)] = etag
+            self._sizes[(bucket, key, etag)] = size
+            while len(self._sizes) > self.max_entries:
+                (old_bucket, old_key, old_etag), _ = self._sizes.popitem(last=False)
+                if self._etags.get((old_bucket, old_key)) == old_etag:
+                    del self._etags[(old_bucket, old_key)]
+
+    def get_size(self, bucket, key):
+        """
+        Returns:
+            tuple: (width, height) in pixels.
+        """
+        client = self._client_factory()
+        etag, size = self._cached(bucket, key)
+
+        request = {"Bucket": bucket, "Key": key, "Range": f"bytes=0-{self.probe_bytes - 1}"}
+        if size is not None:
+            request["IfNoneMatch"] = etag
+        try:
+            obj = client.get_object(**request)
+        except ClientError as e:
+            if size is not None and e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+                return size
+            raise
+
+        header = obj["Body"].read()
+        try:
+            size = read_image_size(header)
+        except Exception:
+            # Header larger than the probe (or a format that stores its size at
+            # the end, like some TIFFs); fall back to the whole object
+            obj = client.get_object(Bucket=bucket, Key=key, IfMatch=obj["ETag"])
+            size = read_image_size(obj["Body"].read())
+
+        self._remember(bucket, key, obj["ETag"], size)
+        return size
+
+def read_image_size(data):
+    """Return (width, height) from the start of an encoded image. Only the header is parsed."""
+    # Image.open is lazy: it parses the header and does not decode pixel data
+    with Image.open(io.BytesIO(data)) as img:
+        return img.size
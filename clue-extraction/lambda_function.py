@@ -1,11 +1,76 @@
 import boto3
 import json
+import os
 import re
-from PIL import Image
-import io
+import threading
+import time
+from clue_parser import parse_clue
+from document_analysis import AnalysisPending, iter_job_blocks, iter_pages, start_analysis
+from image_size import ImageSizeCache
+from instrumentation import instrumented_handler, span
+from textract_cache import TextractCache, disk_store, etag_key, expand_blocks, s3_store
 
-textract = boto3.client("textract")
-s3 = boto3.client("s3")
+FEATURE_TYPES = ["LAYOUT"]
+
+ACROSS_HEADER = re.compile(r'^\s*Across[:\s]*$', re.IGNORECASE)
+DOWN_HEADER = re.compile(r'^\s*Down[:\s]*$', re.IGNORECASE)
+CLUE_LINE = re.compile(r'^\d')
+
+# Clue lines may sit this far (normalized width) right of their column header
+TOLERANCE = 0.05
+
+# Stop waiting for an asynchronous Textract job this long before the Lambda
+# times out, leaving time to page through the results; the caller polls again
+# with the returned job_id
+deadline_margin_ms = int(os.environ.get("TEXTRACT_DEADLINE_MARGIN_MS", "10000"))
+
+# Largest image AnalyzeDocument accepts inline as Bytes; bigger ones are read from S3
+MAX_INLINE_BYTES = 10 * 1024 * 1024
+
+# Clients are created on first use so a cold start only pays for the imports
+_textract = None
+_s3 = None
+_client_lock = threading.Lock()
+
+def get_textract_client():
+    global _textract
+    with _client_lock:
+        if _textract is None:
+            _textract = boto3.client("textract")
+    return _textract
+
+def get_s3_client():
+    global _s3
+    with _client_lock:
+        if _s3 is None:
+            _s3 = boto3.client("s3")
+    return _s3
+
+_textract_cache = None
+
+def get_textract_cache():
+    """
+    Textract response cache keyed by S3 ETag and feature set. The in-memory tier
+    survives warm invocations; TEXTRACT_CACHE_DIR (e.g. /tmp/textract-cache) or
+    TEXTRACT_CACHE_BUCKET/TEXTRACT_CACHE_PREFIX add a persistent tier.
+    """
+    global _textract_cache
+    with _client_lock:
+        if _textract_cache is not None:
+            return _textract_cache
+    store = None
+    if os.environ.get("TEXTRACT_CACHE_BUCKET"):
+        store = s3_store(get_s3_client(), os.environ["TEXTRACT_CACHE_BUCKET"],
+                         os.environ.get("TEXTRACT_CACHE_PREFIX", "textract-cache/"))
+    elif os.environ.get("TEXTRACT_CACHE_DIR"):
+        store = disk_store(os.environ["TEXTRACT_CACHE_DIR"])
+    with _client_lock:
+        if _textract_cache is None:
+            _textract_cache = TextractCache(int(os.environ.get("TEXTRACT_CACHE_SIZE", "64")), store)
+    return _textract_cache
+
+# Survives warm invocations, so a page seen before costs a 304 instead of a header read
+_image_sizes = ImageSizeCache(get_s3_client)
 
 def overlaps(block_box, exclude_box, tolerance=0.0):
     """
@@ -24,14 +89,16 @@ def overlaps(block_box, exclude_box, tolerance=0.0):
 
     return not (b_right < e_left or b_left > e_right or b_bottom < e_top or b_top > e_bottom)
 
-def normalize_bbox(pixel_bbox, bucket, key):
+def normalize_bbox(pixel_bbox, bucket, key, image_width=None, image_height=None):
     """
     Convert a pixel-based bbox [x, y, w, h] into Textract normalized coordinates {Left, Top, Width, Height}.
+    If the image size is not given it is read from the image header in S3.
     """
-    # Download image from S3 to get dimensions
-    s3_obj = s3.get_object(Bucket=bucket, Key=key)
-    img = Image.open(io.BytesIO(s3_obj["Body"].read()))
-    img_width, img_height = img.size
+    if image_width and image_height:
+        img_width, img_height = image_width, image_height
+    else:
+        with span("s3_image_size"):
+            img_width, img_height = _image_sizes.get_size(bucket, key)
 
     x, y, w, h = pixel_bbox
     return {
@@ -41,36 +108,52 @@ def normalize_bbox(pixel_bbox, bucket, key):
         "Height": h / img_height
     }
 
-def lambda_handler(event, context):
-    # If invoked via API Gateway, body will be a JSON string
-    if "body" in event:
-        body = json.loads(event["body"])
-    else:
-        body = event  # direct invocation
+def analyze_page(bucket, key, use_cache=True, etag=None, image_bytes=None):
+    """
+    Runs Textract on one page in S3 and returns its LINE blocks.
+    Responses are cached by ETag, so re-running extraction on the same page
+    (e.g. with a different grid_bbox or tolerance) does not call Textract again.
 
-    bucket = body["bucket"]
-    key = body["key"]
+    Args:
+        etag: The object's ETag if the caller already has it (skips a HEAD request).
+        image_bytes: The page if the caller already downloaded it; sent inline
+            when small enough, so Textract does not read the object again.
+    """
+    def analyze():
+        if image_bytes is not None and len(image_bytes) <= MAX_INLINE_BYTES:
+            document = {"Bytes": image_bytes}
+        else:
+            document = {"S3Object": {"Bucket": bucket, "Name": key}}
+        with span("textract") as fields:
+            response = get_textract_client().analyze_document(Document=document, FeatureTypes=FEATURE_TYPES)
+            fields["blocks"] = len(response["Blocks"])
+        return response["Blocks"]
 
-    # Optional: exclusion area for crossword grid
-    grid_bbox = body.get("grid_bbox")  # may be list [x,y,w,h] or dict
-    if grid_bbox:
-        if isinstance(grid_bbox, list) and len(grid_bbox) == 4:
-            grid_bbox = normalize_bbox(grid_bbox, bucket, key)
-        elif not isinstance(grid_bbox, dict):
-            raise ValueError("grid_bbox must be either a dict {Left,Top,Width,Height} or list [x,y,w,h]")
+    if not use_cache:
+        return analyze()
+    if etag is None:
+        with span("s3_head"):
+            etag = get_s3_client().head_object(Bucket=bucket, Key=key)["ETag"]
+    return get_textract_cache().get_or_analyze(etag_key(etag, FEATURE_TYPES), analyze)
 
-    TOLERANCE = 0.05
+def extract_clues(blocks, grid_bbox=None, tolerance=TOLERANCE):
+    """
+    Split Textract LINE blocks into across and down clue lists.
 
-    response = textract.analyze_document(
-        Document={"S3Object": {"Bucket": bucket, "Name": key}},
-        FeatureTypes=["LAYOUT"]
-    )
+    Args:
+        blocks: Textract Blocks (live or replayed from the cache).
+        grid_bbox: Optional normalized {Left, Top, Width, Height} to exclude.
+        tolerance: Column tolerance relative to the Across/Down header positions.
 
+    Returns:
+        tuple: (across_clues, down_clues), each a list of
+        {"number", "direction", "text", "enumeration"} records.
+    """
     lines = []
     across_header_left = None
     down_header_left = None
 
-    for block in response["Blocks"]:
+    for block in blocks:
         if block["BlockType"] == "LINE":
             # Skip if block falls inside the crossword grid
             if grid_bbox and overlaps(block["Geometry"]["BoundingBox"], grid_bbox):
@@ -80,15 +163,15 @@ def lambda_handler(event, context):
             if not text:
                 continue
 
-            if re.match(r'^\s*Across[:\s]*$', text, re.IGNORECASE):
+            if ACROSS_HEADER.match(text):
                 across_header_left = block["Geometry"]["BoundingBox"]["Left"]
                 continue
-            if re.match(r'^\s*Down[:\s]*$', text, re.IGNORECASE):
+            if DOWN_HEADER.match(text):
                 down_header_left = block["Geometry"]["BoundingBox"]["Left"]
                 continue
 
             # Only keep lines that look like clues (start with a number)
-            if not re.match(r'^\d', text):
+            if not CLUE_LINE.match(text):
                 continue
 
             lines.append({
@@ -103,10 +186,125 @@ def lambda_handler(event, context):
     across_clues, down_clues = [], []
 
     for line in lines:
-        if down_header_left is not None and line["left"] >= down_header_left - TOLERANCE:
-            down_clues.append(line["text"])
-        elif across_header_left is not None and line["left"] <= across_header_left + TOLERANCE:
-            across_clues.append(line["text"])
+        if down_header_left is not None and line["left"] >= down_header_left - tolerance:
+            down_clues.append(parse_clue(line["text"], "down"))
+        elif across_header_left is not None and line["left"] <= across_header_left + tolerance:
+            across_clues.append(parse_clue(line["text"], "across"))
+
+    return across_clues, down_clues
+
+def extract_document_clues(bucket, key, grid_bbox=None, tolerance=TOLERANCE, use_cache=True,
+                           textract=None, poll_interval=2.0, job_id=None, deadline=None, etag=None):
+    """
+    Runs asynchronous Textract analysis on a multi-page document (e.g. a PDF
+    puzzle book) and yields one {"page", "across", "down"} dict per page as the
+    paginated results arrive.
+
+    Args:
+        grid_bbox: Optional normalized {Left, Top, Width, Height} excluded on every page.
+        textract: Client to use instead of boto3's, e.g. document_analysis.LocalTextract.
+            Without an etag the cache is then skipped, so nothing calls S3.
+        job_id: A job started by an earlier call, to resume instead of starting one.
+        deadline: Optional time.monotonic() value to stop waiting for the job at.
+        etag: The object's ETag if the caller already has it (skips a HEAD request).
+
+    Raises:
+        AnalysisPending: Before the first page, if the job is still running at
+            the deadline; its job_id resumes it.
+    """
+    cache_key, compact = None, None
+    if use_cache and (etag is not None or textract is None):
+        if etag is None:
+            with span("s3_head"):
+                etag = get_s3_client().head_object(Bucket=bucket, Key=key)["ETag"]
+        cache_key = etag_key(etag, FEATURE_TYPES)
+        compact = get_textract_cache().get(cache_key)
+
+    if compact is not None:
+        blocks, cache_key = expand_blocks(compact), None
+    else:
+        client = textract or get_textract_client()
+        if job_id is None:
+            with span("textract_start"):
+                job_id = start_analysis(client, bucket, key, FEATURE_TYPES)
+        blocks = iter_job_blocks(client, job_id, poll_interval=poll_interval, deadline=deadline)
+
+    # Only the LINE blocks are kept for the cache, not the whole response
+    seen = []
+    for page, page_blocks in iter_pages(blocks):
+        if cache_key is not None:
+            seen.extend(block for block in page_blocks if block["BlockType"] == "LINE")
+        with span("extract", page=page):
+            across_clues, down_clues = extract_clues(page_blocks, grid_bbox, tolerance)
+        yield {"page": page, "across": across_clues, "down": down_clues}
+    # Only cache a document that was read to the end
+    if cache_key is not None:
+        get_textract_cache().put(cache_key, seen)
+
+@instrumented_handler
+def lambda_handler(event, context):
+    """
+    Body: {"bucket", "key", "grid_bbox": optional, "image_width"/"image_height": optional,
+    "tolerance": optional, "use_cache": optional (default true)}
+
+    PDFs (or "multi_page": true) go through asynchronous analysis and return
+    {"pages": [{"page", "across", "down"}, ...]}; grid_bbox must then be the
+    normalized dict form and applies to every page. Textract jobs often outlast
+    the invocation: waiting stops TEXTRACT_DEADLINE_MARGIN_MS before the
+    timeout, and the response is 202 {"job_id", "status": "IN_PROGRESS"}. Call
+    again with the same body plus "job_id" to pick the job up.
+    """
+    # If invoked via API Gateway, body will be a JSON string
+    if "body" in event:
+        body = json.loads(event["body"])
+    else:
+        body = event  # direct invocation
+
+    bucket = body["bucket"]
+    key = body["key"]
+
+    # Optional: exclusion area for crossword grid
+    grid_bbox = body.get("grid_bbox")  # may be list [x,y,w,h] or dict
+    tolerance = float(body.get("tolerance", TOLERANCE))
+    use_cache = body.get("use_cache", True)
+
+    if body.get("multi_page", key.lower().endswith(".pdf")):
+        if grid_bbox and not isinstance(grid_bbox, dict):
+            raise ValueError("grid_bbox for multi-page documents must be a dict {Left,Top,Width,Height}")
+        deadline = None
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            deadline = time.monotonic() + (context.get_remaining_time_in_millis() - deadline_margin_ms) / 1000
+        try:
+            # The pages hold only the parsed clues; the Textract blocks are streamed through
+            pages = list(extract_document_clues(bucket, key, grid_bbox, tolerance, use_cache,
+                                                job_id=body.get("job_id"), deadline=deadline))
+        except AnalysisPending as pending:
+            return {
+                "statusCode": 202,
+                "headers": {
+                    "Content-Type": "application/json"
+                },
+                "body": json.dumps({"job_id": pending.job_id, "status": "IN_PROGRESS"})
+            }
+        return {
+            "statusCode": 200,
+            "headers": {
+                "Content-Type": "application/json"
+            },
+            "body": json.dumps({"pages": pages}, indent=2)
+        }
+
+    if grid_bbox:
+        if isinstance(grid_bbox, list) and len(grid_bbox) == 4:
+            grid_bbox = normalize_bbox(
+                grid_bbox, bucket, key, body.get("image_width"), body.get("image_height")
+            )
+        elif not isinstance(grid_bbox, dict):
+            raise ValueError("grid_bbox must be either a dict {Left,Top,Width,Height} or list [x,y,w,h]")
+
+    blocks = analyze_page(bucket, key, use_cache=use_cache)
+    with span("extract"):
+        across_clues, down_clues = extract_clues(blocks, grid_bbox, tolerance)
 
     result = {
         "across": across_clues,
@@ -119,4 +317,4 @@ def lambda_handler(event, context):
             "Content-Type": "application/json"
         },
         "body": json.dumps(result, indent=2)
-    }
\ No newline at end of file
+    }
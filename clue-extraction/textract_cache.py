@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from stores import DiskStore, LRUCache, S3Store
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored format changes so stale persisted entries are ignored
+CACHE_VERSION = 1
+
+# Only LINE blocks are used for clue extraction; WORD/LAYOUT blocks and polygons
+# make up most of a Textract response and are not stored
+BOX_FIELDS = ("Left", "Top", "Width", "Height")
+
+def _features_tag(feature_types):
+    return "+".join(sorted(feature_types))
+
+def etag_key(etag, feature_types):
+    """Cache key for an S3 object given its ETag and the Textract feature set."""
+    etag = etag.strip('"')
+    return f"v{CACHE_VERSION}-etag-{etag}-{_features_tag(feature_types)}"
+
+def content_key(document_bytes, feature_types):
+    """Cache key for a document given its raw bytes and the Textract feature set."""
+    digest = hashlib.sha256(document_bytes).hexdigest()
+    return f"v{CACHE_VERSION}-sha256-{digest}-{_features_tag(feature_types)}"
+
+def compact_blocks(blocks):
+    """
+    Reduce Textract Blocks to the LINE blocks, stored column-wise:
+    {"text": [...], "page": [...], "box": [[left, top, width, height], ...]}
+    """
+    text, page, box = [], [], []
+    for block in blocks:
+        if block["BlockType"] != "LINE":
+            continue
+        bbox = block["Geometry"]["BoundingBox"]
+        text.append(block.get("Text", ""))
+        page.append(block.get("Page", 1))
+        box.append([round(bbox[f], 6) for f in BOX_FIELDS])
+    return {"text": text, "page": page, "box": box}
+
+def expand_blocks(compact):
+    """Rebuild Textract-shaped LINE blocks from compact_blocks output."""
+    return [
+        {
+            "BlockType": "LINE",
+            "Text": text,
+            "Page": page,
+            "Geometry": {"BoundingBox": dict(zip(BOX_FIELDS, box))}
+        }
+        for text, page, box in zip(compact["text"], compact["page"], compact["box"])
+    ]
+
+def encode(compact):
+    return gzip.compress(json.dumps(compact, separators=(",", ":")).encode("utf-8"))
+
+def decode(data):
+    return json.loads(gzip.decompress(data))
+
+def disk_store(directory):
+    """Persistent tier storing one gzipped JSON file per key, e.g. under Lambda's /tmp."""
+    return DiskStore(directory, suffix=".json.gz")
+
+def s3_store(client, bucket, prefix="textract-cache/"):
+    """Persistent tier storing one gzipped JSON object per key under an S3 prefix."""
+    return S3Store(client, bucket, prefix, suffix=".json.gz", content_encoding="gzip")
+
+class TextractCache:
+    """
+    Two-tier cache of compacted Textract responses.
+
+    The in-memory LRU holds compact dicts; the optional persistent store
+    (any object with get(key) and put(key, bytes)) holds them gzipped.
+    """
+
+    def __init__(self, max_entries=64, store=None):
+        self.memory = LRUCache(max_entries)
+        self.store = store
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the compact entry for key, or None."""
+        compact = self.memory.get(key)
+        if compact is not None:
+            with self._lock:
+                self.stats["memory_hits"] += 1
+            return compact
+        data = self.store.get(key) if self.store is not None else None
+        if data is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        compact = decode(data)
+        with self._lock:
+            self.stats["store_hits"] += 1
+        self.memory.put(key, compact)
+        return compact
+
+    def put(self, key, blocks):
+        """Compact and store a Textract Blocks list; returns the compact entry."""
+        compact = compact_blocks(blocks)
+        self.memory.put(key, compact)
+        if self.store is not None:
+            try:
+                self.store.put(key, encode(compact))
+            except Exception as e:
+                # The response is still valid; only persistence failed
+                logger.warning("Failed to persist Textract response %s: %s", key, e)
+        return compact
+
+    def get_or_analyze(self, key, analyze):
+        """Return LINE blocks for key, calling analyze() -> Blocks only on a miss."""
+        compact = self.get(key)
+        if compact is None:
+            compact = self.put(key, analyze())
+        return expand_blocks(compact)
@@ -0,0 +1,200 @@
+"""
+Evaluates grid detection accuracy against the generated dataset.
+
+Every page in <dataset>/images is run through get_crossword_grid_array on a
+process pool and compared with <dataset>/solutions/<name>_solution.json.
+Each result is appended to a JSON-lines results file as soon as it finishes,
+so an interrupted run picks up where it stopped when started again.
+
+Usage (from the grid-detection directory):
+    python evaluate.py --dataset ../dataset --workers 8
+    python evaluate.py --dataset ../dataset --line-method lattice --results lattice.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from glob import glob
+
+import cv2
+import numpy as np
+
+from lambda_function.grid_detect import LINE_METHODS, get_crossword_grid_array
+
+STAGES = ["decode", "bbox", "warp", "detect", "number"]
+
+
+def load_solution_data(json_path):
+    """Load the solution JSON and return (grid, numbers)."""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    grid = np.array(data["grid"], dtype=int)
+    numbers = np.array(data.get("numbers", np.zeros_like(grid)), dtype=int)
+    return grid, numbers
+
+
+def compare_grids(grid1, grid2):
+    """Compare two grids and return True if identical."""
+    if grid1.shape != grid2.shape:
+        return False
+    return np.array_equal(grid1, grid2)
+
+
+def _init_worker():
+    # One OpenCV thread per process; the pool already uses every core
+    cv2.setNumThreads(1)
+
+
+def evaluate_one(name, img_path, sol_path, settings):
+    """Run detection on one page and return a JSON-serialisable result record."""
+    record = {"name": name, "settings": settings, "timings": {}}
+    start = time.perf_counter()
+    try:
+        sol_grid, sol_numbers = load_solution_data(sol_path)
+        record["solution_shape"] = list(sol_grid.shape)
+
+        t0 = time.perf_counter()
+        image = cv2.imread(img_path)
+        record["timings"]["decode"] = time.perf_counter() - t0
+        if image is None:
+            raise FileNotFoundError(f"Could not load image {img_path}")
+
+        det_grid, det_numbers, _, _, _ = get_crossword_grid_array(
+            image, timings=record["timings"], **settings
+        )
+        record["detected_shape"] = list(det_grid.shape)
+
+        grid_match = compare_grids(sol_grid, det_grid)
+        num_match = compare_grids(sol_numbers, det_numbers)
+        if grid_match and num_match:
+            record["status"] = "full_match"
+        elif grid_match:
+            record["status"] = "grid_only"
+        else:
+            record["status"] = "mismatch"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["total"] = time.perf_counter() - start
+    return record
+
+
+def load_results(results_path, settings):
+    """Read previous results for the same settings, keyed by page name."""
+    done = {}
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if record.get("settings") == settings:
+                done[record["name"]] = record
+    return done
+
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+    return f"p50 {p50:7.1f}  p90 {p90:7.1f}  p99 {p99:7.1f}  max {max(values) * 1000:7.1f} ms"
+
+
+def summarise(records):
+    counts = {status: 0 for status in ("full_match", "grid_only", "mismatch", "error")}
+    for record in records:
+        counts[record["status"]] += 1
+    total = len(records)
+
+    print("\n==== SUMMARY ====")
+    print(f"Total puzzles:          {total}")
+    print(f"Matching grid+numbers: {counts['full_match']}")
+    print(f"Matching grid only:    {counts['grid_only']}")
+    print(f"Non-matching:          {counts['mismatch']}")
+    print(f"Errors:                {counts['error']}")
+    if total:
+        print(f"Grid accuracy:         {(counts['full_match'] + counts['grid_only']) / total:.2%}")
+
+    print("\n==== LATENCY ====")
+    for stage in STAGES:
+        print(f"{stage:8s} {percentiles([r['timings'][stage] for r in records if stage in r['timings']])}")
+    print(f"{'total':8s} {percentiles([r['total'] for r in records])}")
+
+    failures = sorted((r for r in records if r["status"] in ("mismatch", "error")), key=lambda r: r["name"])
+    if failures:
+        print("\n==== FAILURES ====")
+        for record in failures:
+            detail = record.get("error") or (
+                f"solution {tuple(record['solution_shape'])}, "
+                f"detected {tuple(record.get('detected_shape', ()))}"
+            )
+            print(f"{record['name']}: {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate grid detection accuracy on the generated dataset.")
+    parser.add_argument("--dataset", default="../dataset", help="Directory with images/ and solutions/")
+    parser.add_argument("--results", default="grid-eval-results.jsonl", help="JSON-lines file to append results to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--max-files", type=int, help="Only evaluate the first N pages")
+    parser.add_argument("--pyramid-levels", type=int, default=0)
+    parser.add_argument("--line-method", default="morphology", choices=sorted(LINE_METHODS))
+    parser.add_argument("--fresh", action="store_true", help="Ignore previous results instead of resuming")
+    args = parser.parse_args(argv)
+
+    settings = {"pyramid_levels": args.pyramid_levels, "line_method": args.line_method}
+    images_dir = os.path.join(args.dataset, "images")
+    solutions_dir = os.path.join(args.dataset, "solutions")
+
+    solution_files = sorted(glob(os.path.join(solutions_dir, "*_solution.json")))
+    if args.max_files is not None:
+        solution_files = solution_files[:args.max_files]
+
+    tasks = []
+    for sol_path in solution_files:
+        name = os.path.basename(sol_path).replace("_solution.json", "")
+        img_path = os.path.join(images_dir, f"{name}.png")
+        if not os.path.exists(img_path):
+            print(f"⚠️ No image found for {sol_path}")
+            continue
+        tasks.append((name, img_path, sol_path))
+
+    if args.fresh and os.path.exists(args.results):
+        os.remove(args.results)
+    done = load_results(args.results, settings)
+    wanted = {name for name, _, _ in tasks}
+    records = [record for name, record in done.items() if name in wanted]
+    todo = [task for task in tasks if task[0] not in done]
+    print(f"{len(tasks)} pages, {len(records)} already evaluated, {len(todo)} to run on {args.workers} workers")
+
+    start = time.perf_counter()
+    with open(args.results, "a") as out, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(evaluate_one, *task, settings) for task in todo]
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                # Flush every record so an interrupted run loses at most the pages in flight
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                records.append(record)
+                if i % 100 == 0 or i == len(todo):
+                    rate = i / (time.perf_counter() - start)
+                    print(f"[{i}/{len(todo)}] {rate:.1f} pages/s")
+        except KeyboardInterrupt:
+            print("Interrupted; rerun the same command to resume.")
+            for future in futures:
+                future.cancel()
+            return 130
+
+    summarise(records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,32 @@
+import argparse
+import logging
+import sys
+import time
 import cv2
 from pathlib import Path
 import numpy as np
 
-def find_crossword_bounding_box(image):
+logger = logging.getLogger(__name__)
+
+def to_grayscale(image):
     """
-    Finds the bounding box of the crossword puzzle in an image.
-    This function operates on an already-loaded OpenCV image object.
-    
-    Args:
-        image (np.ndarray): The input image array.
-    
-    Returns:
-        A tuple (x, y, w, h) of the bounding box coordinates, or None if not found.
+    Returns a single-channel version of the image, converting only if needed.
+    Passing an already-gray image through every stage avoids repeated cvtColor calls.
+    """
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def find_crossword_contour(image):
+    """
+    Returns the largest dark contour on the page, which is likely the crossword grid,
+    or None if nothing is found.
     """
     if image is None:
         return None
     
     # Convert to grayscale and apply a Gaussian blur
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = to_grayscale(image)
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
     
     # Binarize the image to isolate the grid
@@ -30,28 +39,62 @@ def find_crossword_bounding_box(image):
         return None
     
     # Find the largest contour, which is likely the crossword grid
-    largest_contour = max(contours, key=cv2.contourArea)
+    return max(contours, key=cv2.contourArea)
+
+def find_crossword_bounding_box(image):
+    """
+    Finds the bounding box of the crossword puzzle in an image.
+    This function operates on an already-loaded OpenCV image object.
+    
+    Args:
+        image (np.ndarray): The input image array.
+    
+    Returns:
+        A tuple (x, y, w, h) of the bounding box coordinates, or None if not found.
+    """
+    largest_contour = find_crossword_contour(image)
+    if largest_contour is None:
+        return None
     
     # Get and return the bounding box
     x, y, w, h = cv2.boundingRect(largest_contour)
     return (x, y, w, h)
 
-def find_and_warp_crossword_grid(image):
+def order_corners(points):
     """
-    Finds the four corners of the crossword grid and applies a perspective transform
-    to warp the grid into a perfect square.
+    Orders points as top-left, top-right, bottom-right, bottom-left.
+    For more than four points the extreme points in each diagonal direction are used.
+    """
+    # This is a common method using sum and difference of coordinates
+    # Sums: top-left has min sum, bottom-right has max sum
+    # Differences: top-right has min diff, bottom-left has max diff
+    rect = np.zeros((4, 2), dtype="float32")
+    s = points.sum(axis=1)
+    rect[0] = points[np.argmin(s)] # Top-left
+    rect[2] = points[np.argmax(s)] # Bottom-right
+    
+    diff = np.diff(points, axis=1)
+    rect[1] = points[np.argmin(diff)] # Top-right
+    rect[3] = points[np.argmax(diff)] # Bottom-left
+    
+    return rect
+
+def find_crossword_corners(image):
+    """
+    Finds the four corners of the crossword grid.
 
     Args:
         image (np.ndarray): The cropped image containing just the crossword grid.
 
     Returns:
-        The rectified (warped) image, or None on failure.
+        A float32 array of shape (4, 2) ordered top-left, top-right,
+        bottom-right, bottom-left, or None on failure.
     """
     if image is None:
         return None
     
     # Convert to grayscale and apply a Gaussian blur
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = to_grayscale(image)
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
     
     # Use adaptive thresholding to get a clean binary image
@@ -72,68 +115,202 @@ def find_and_warp_crossword_grid(image):
     approx = cv2.approxPolyDP(main_contour, 0.02 * perimeter, True)
 
     # We expect a quadrilateral (4 corners) for the grid
-    if len(approx) == 4:
-        # Get the four corner points
-        points = approx.reshape(4, 2)
-        
-        # Order the points as top-left, top-right, bottom-right, bottom-left
-        # This is a common method using sum and difference of coordinates
-        # Sums: top-left has min sum, bottom-right has max sum
-        # Differences: top-right has min diff, bottom-left has max diff
-        rect = np.zeros((4, 2), dtype="float32")
-        s = points.sum(axis=1)
-        rect[0] = points[np.argmin(s)] # Top-left
-        rect[2] = points[np.argmax(s)] # Bottom-right
-        
-        diff = np.diff(points, axis=1)
-        rect[1] = points[np.argmin(diff)] # Top-right
-        rect[3] = points[np.argmax(diff)] # Bottom-left
-        
-        # Get the dimensions of the square to warp to
-        (tl, tr, br, bl) = rect
-        widthA = np.sqrt(((br[0] - bl[0]) ** 2) + ((br[1] - bl[1]) ** 2))
-        widthB = np.sqrt(((tr[0] - tl[0]) ** 2) + ((tr[1] - tl[1]) ** 2))
-        maxWidth = max(int(widthA), int(widthB))
-        
-        heightA = np.sqrt(((tr[0] - br[0]) ** 2) + ((tr[1] - br[1]) ** 2))
-        heightB = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
-        maxHeight = max(int(heightA), int(heightB))
-        
-        # Define the destination points for the warp
-        dst = np.array([
-            [0, 0],
-            [maxWidth - 1, 0],
-            [maxWidth - 1, maxHeight - 1],
-            [0, maxHeight - 1]
-        ], dtype="float32")
-        
-        # Get the perspective transform matrix and warp the image
-        M = cv2.getPerspectiveTransform(rect, dst)
-        warped = cv2.warpPerspective(image, M, (maxWidth, maxHeight))
-        
-        return warped
-    else:
-        print(f"Detected {len(approx)} corners, not 4. Cannot warp.")
+    if len(approx) != 4:
+        logger.warning("Detected %d corners, not 4. Cannot warp.", len(approx))
         return None
 
-def detect_crossword_grid(image):
+    # Order the four corner points as top-left, top-right, bottom-right, bottom-left
+    return order_corners(approx.reshape(4, 2))
+
+def warp_crossword_grid(image, rect):
     """
-    Detects crossword grid automatically and outputs:
-    - matrix: 0 = black cell, 1 = answer cell
-    - overlay: original image with detected grid lines drawn
+    Applies a perspective transform that maps the four grid corners onto a square.
 
-    Parameters:
-        image (numpy.ndarray): Input crossword image (cv2.imread).
+    Args:
+        image (np.ndarray): The cropped image the corners are relative to.
+        rect (np.ndarray): Corners ordered top-left, top-right, bottom-right, bottom-left.
 
     Returns:
-        tuple: (matrix, overlay_image)
+        The rectified (warped) image.
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    # Binarize (invert so lines are white)
-    binary = cv2.adaptiveThreshold(~gray, 255, 
-                                   cv2.ADAPTIVE_THRESH_MEAN_C, 
-                                   cv2.THRESH_BINARY, 15, -2)
+    # Get the dimensions of the square to warp to
+    (tl, tr, br, bl) = rect
+    widthA = np.sqrt(((br[0] - bl[0]) ** 2) + ((br[1] - bl[1]) ** 2))
+    widthB = np.sqrt(((tr[0] - tl[0]) ** 2) + ((tr[1] - tl[1]) ** 2))
+    maxWidth = max(int(widthA), int(widthB))
+    
+    heightA = np.sqrt(((tr[0] - br[0]) ** 2) + ((tr[1] - br[1]) ** 2))
+    heightB = np.sqrt(((tl[0] - bl[0]) ** 2) + ((tl[1] - bl[1]) ** 2))
+    maxHeight = max(int(heightA), int(heightB))
+    
+    # Define the destination points for the warp
+    dst = np.array([
+        [0, 0],
+        [maxWidth - 1, 0],
+        [maxWidth - 1, maxHeight - 1],
+        [0, maxHeight - 1]
+    ], dtype="float32")
+    
+    # Get the perspective transform matrix and warp the image
+    M = cv2.getPerspectiveTransform(rect, dst)
+    return cv2.warpPerspective(image, M, (maxWidth, maxHeight))
+
+def find_and_warp_crossword_grid(image):
+    """
+    Finds the four corners of the crossword grid and applies a perspective transform
+    to warp the grid into a perfect square.
+
+    Args:
+        image (np.ndarray): The cropped image containing just the crossword grid.
+
+    Returns:
+        The rectified (warped) image, or None on failure.
+    """
+    rect = find_crossword_corners(image)
+    if rect is None:
+        return None
+    return warp_crossword_grid(image, rect)
+
+def refine_crossword_corners(image, rect, radius):
+    """
+    Snaps approximate corners onto the outer edge of the grid border at full
+    resolution, looking only at a small window around each corner.
+
+    Args:
+        image (np.ndarray): Full-resolution image the corners are relative to.
+        rect (np.ndarray): Approximate corners ordered top-left, top-right,
+            bottom-right, bottom-left.
+        radius (int): Half-size of the search window around each corner.
+
+    Returns:
+        The refined corners in the same order.
+    """
+    gray = to_grayscale(image)
+    h, w = gray.shape[:2]
+    # Same criteria used to order the corners: extreme x+y or y-x per corner
+    weights = [(-1, -1), (1, -1), (1, 1), (-1, 1)]
+
+    refined = rect.copy()
+    for i, (cx, cy) in enumerate(rect):
+        x1, x2 = max(int(cx) - radius, 0), min(int(cx) + radius + 1, w)
+        y1, y2 = max(int(cy) - radius, 0), min(int(cy) + radius + 1, h)
+        window = gray[y1:y2, x1:x2]
+        if window.shape[0] < 11 or window.shape[1] < 11:
+            continue
+
+        blurred = cv2.GaussianBlur(window, (5, 5), 0)
+        binary = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                       cv2.THRESH_BINARY_INV, 11, 2)
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        if not contours:
+            continue
+
+        # The border is the largest blob in the window; ignore scan noise
+        points = max(contours, key=cv2.contourArea).reshape(-1, 2)
+        wx, wy = weights[i]
+        best = points[np.argmax(wx * points[:, 0] + wy * points[:, 1])]
+        refined[i] = (best[0] + x1, best[1] + y1)
+
+    return refined
+
+def locate_crossword_grid_coarse(gray, levels=2):
+    """
+    Finds the bounding box and corners on a downscaled copy of the page and maps
+    them back to full resolution, so only the final warp touches every pixel.
+
+    Args:
+        gray (np.ndarray): Full-resolution single-channel page image.
+        levels (int): Number of pyramid levels; each halves the image size.
+
+    Returns:
+        tuple: (grid_bbox, rect) in full-resolution coordinates, where rect is
+        relative to the bbox crop, or (None, None) on failure.
+    """
+    # Min-pool instead of pyrDown: averaging washes out the thin grid lines,
+    # while keeping the darkest pixel of each block preserves them
+    factor = 2 ** levels
+    full_h, full_w = gray.shape[:2]
+    block = np.ones((factor, factor), dtype=np.uint8)
+    small = np.ascontiguousarray(cv2.erode(gray, block, anchor=(0, 0))[::factor, ::factor])
+
+    # The grid is the largest dark blob even at low resolution, where the thin
+    # cell lines break up, so take its extreme points as the coarse corners
+    contour = find_crossword_contour(small)
+    if contour is None:
+        return None, None
+    small_rect = order_corners(contour.reshape(-1, 2))
+
+    # Map pixel centres from the small image back to page coordinates
+    rect = (small_rect + 0.5) * factor - 0.5
+
+    # Coarse corners are only accurate to a few pixels, which is enough to clip
+    # the outer grid lines, so snap them to the border at full resolution
+    radius = 4 * factor + 8
+    rect = refine_crossword_corners(gray, rect, radius)
+
+    # The refined corners are the extreme points of the grid, so they define the bbox
+    x, y = np.floor(rect.min(axis=0)).astype(int)
+    x2, y2 = np.floor(rect.max(axis=0)).astype(int) + 1
+    x, y = max(int(x), 0), max(int(y), 0)
+    grid_bbox = (x, y, min(int(x2), full_w) - x, min(int(y2), full_h) - y)
+
+    rect -= np.array([x, y], dtype=rect.dtype)
+    return grid_bbox, rect
+
+def classify_cells(gray, x_lines, y_lines, threshold=128):
+    """
+    Classifies every grid cell as black or answer in a single vectorised pass.
+
+    Cell sums are read from an integral image at the corners given by the
+    detected line positions, so the cost no longer depends on the cell size.
+
+    Args:
+        gray (np.ndarray): Single-channel image the lines were detected on.
+        x_lines (list): Vertical line positions (n_cols + 1 values).
+        y_lines (list): Horizontal line positions (n_rows + 1 values).
+        threshold (int): Mean intensity below which a cell is black.
+
+    Returns:
+        tuple: (matrix, confidence)
+            matrix: 0 = black cell, 1 = answer cell
+            confidence: 0.0 (at the threshold) to 1.0 (pure black/white)
+
+    A zero-area cell (two lines on the same pixel) has no pixels to average and
+    is reported as an answer cell with confidence 0.
+    """
+    xs = np.asarray(x_lines, dtype=int)
+    ys = np.asarray(y_lines, dtype=int)
+    if len(xs) < 2 or len(ys) < 2:
+        shape = (max(len(ys) - 1, 0), max(len(xs) - 1, 0))
+        return np.zeros(shape, dtype=int), np.zeros(shape, dtype=float)
+
+    # integral[y, x] holds the sum of gray[:y, :x]
+    integral = cv2.integral(gray, sdepth=cv2.CV_64F)
+    sums = (integral[np.ix_(ys[1:], xs[1:])] - integral[np.ix_(ys[:-1], xs[1:])]
+            - integral[np.ix_(ys[1:], xs[:-1])] + integral[np.ix_(ys[:-1], xs[:-1])])
+    areas = np.outer(np.diff(ys), np.diff(xs))
+    empty = areas <= 0
+    means = np.where(empty, threshold, sums / np.maximum(areas, 1))
+
+    matrix = (means >= threshold).astype(int)
+
+    # Distance from the threshold, scaled by the room available on that side
+    confidence = np.where(matrix == 1,
+                          (means - threshold) / (255 - threshold),
+                          (threshold - means) / threshold)
+    return matrix, np.clip(confidence, 0.0, 1.0)
+
+def find_grid_lines_morphology(binary):
+    """
+    Finds grid line positions by opening the binary image with long horizontal
+    and vertical kernels, then thresholding and merging the projection sums.
+
+    Args:
+        binary (np.ndarray): Binarized grid image with lines in white.
 
+    Returns:
+        tuple: (x_lines, y_lines) lists of line positions.
+    """
     # Extract vertical lines
     vertical = binary.copy()
     cols = vertical.shape[1]
@@ -150,9 +327,6 @@ def detect_crossword_grid(image):
     horizontal = cv2.erode(horizontal, horizontal_structure)
     horizontal = cv2.dilate(horizontal, horizontal_structure)
 
-    # Combine grid
-    grid = cv2.add(horizontal, vertical)
-
     # Find vertical/horizontal line positions
     vertical_sum = np.sum(vertical, axis=0)
     horizontal_sum = np.sum(horizontal, axis=1)
@@ -174,34 +348,128 @@ def detect_crossword_grid(image):
             collapsed.append(int(np.mean(current_group)))
         return collapsed
 
-    x_lines = collapse_positions(x_positions)
-    y_lines = collapse_positions(y_positions)
+    return collapse_positions(x_positions), collapse_positions(y_positions)
 
-    n_rows = len(y_lines) - 1
-    n_cols = len(x_lines) - 1
-    matrix = np.zeros((n_rows, n_cols), dtype=int)
+def fit_lattice(profile, min_cells=3, max_cells=30):
+    """
+    Fits n+1 evenly spaced lines to a 1-D projection profile.
 
-    # Copy for overlay
-    overlay = image.copy()
+    The outer border lines (the strongest runs at either end of the warped grid)
+    fix the span; every candidate cell count n is then scored by how much more
+    ink lies on its lattice points than halfway between them. Because every
+    lattice point contributes, one faint line barely changes the score.
 
-    # Check each cell
-    for r in range(n_rows):
-        for c in range(n_cols):
-            y1, y2 = y_lines[r], y_lines[r+1]
-            x1, x2 = x_lines[c], x_lines[c+1]
-            cell = gray[y1:y2, x1:x2]
-            mean_val = np.mean(cell)
-            if mean_val < 128:  # tweak threshold if needed
-                matrix[r, c] = 0
-            else:
-                matrix[r, c] = 1
+    Args:
+        profile (np.ndarray): Column or row sums of the binarized grid.
+        min_cells (int): Smallest cell count to consider.
+        max_cells (int): Largest cell count to consider.
+
+    Returns:
+        list: n+1 line positions.
+    """
+    profile = profile.astype(float)
+    strong = np.where(profile > profile.max() * 0.5)[0]
+    if len(strong) < 2:
+        return []
+
+    # Centre of the first and last strong runs (the border lines)
+    breaks = np.where(np.diff(strong) > 1)[0]
+    first_run = strong[:breaks[0] + 1] if len(breaks) else strong
+    last_run = strong[breaks[-1] + 1:] if len(breaks) else strong
+    start = first_run.mean()
+    span = last_run.mean() - start
+
+    # A max filter lets slightly misplaced lattice points still land on a line
+    smoothed = profile
+    for shift in (1, 2):
+        smoothed = np.maximum(smoothed, np.maximum(np.roll(profile, shift), np.roll(profile, -shift)))
+
+    scores = {}
+    for n in range(min_cells, max_cells + 1):
+        pitch = span / n
+        if pitch < 4:
+            break
+        k = np.arange(n + 1)
+        on_lattice = smoothed[np.round(start + k * pitch).astype(int)].mean()
+        midpoints = smoothed[np.round(start + (k[:-1] + 0.5) * pitch).astype(int)].mean()
+        scores[n] = on_lattice - midpoints
+
+    if not scores:
+        return []
+    # Divisors of the true count score as well as the true count, while multiples
+    # only reach about half of it, so take the largest count close to the best
+    best_score = max(scores.values())
+    n = max(n for n, score in scores.items() if score >= 0.75 * best_score)
+    pitch = span / n
+    return [int(round(start + k * pitch)) for k in range(n + 1)]
+
+def find_grid_lines_lattice(binary, min_cells=3, max_cells=30):
+    """
+    Finds grid line positions by fitting an evenly spaced lattice to the binary
+    projection profiles, without any morphology.
 
-    # Draw detected grid lines on overlay
-    for x in x_lines:
-        cv2.line(overlay, (x, 0), (x, overlay.shape[0]), (0, 0, 255), 1)
-    for y in y_lines:
-        cv2.line(overlay, (0, y), (overlay.shape[1], y), (0, 0, 255), 1)
+    Args:
+        binary (np.ndarray): Binarized grid image with lines in white.
 
+    Returns:
+        tuple: (x_lines, y_lines) lists of line positions.
+    """
+    # cv2.reduce sums in one vectorised pass; 32-bit sums cannot overflow here
+    col_sum = cv2.reduce(binary, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+    row_sum = cv2.reduce(binary, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+    return (fit_lattice(col_sum, min_cells, max_cells),
+            fit_lattice(row_sum, min_cells, max_cells))
+
+LINE_METHODS = {
+    "morphology": find_grid_lines_morphology,
+    "lattice": find_grid_lines_lattice,
+}
+
+def detect_crossword_grid(image, return_confidence=False, line_method="morphology", draw_overlay=True):
+    """
+    Detects crossword grid automatically and outputs:
+    - matrix: 0 = black cell, 1 = answer cell
+    - overlay: original image with detected grid lines drawn (None if not drawn)
+    - confidence (optional): per-cell distance from the black/white threshold
+
+    Parameters:
+        image (numpy.ndarray): Input crossword image (cv2.imread).
+        return_confidence (bool): Also return the per-cell confidence array.
+        line_method (str): "morphology" (erode/dilate line extraction) or
+            "lattice" (evenly spaced lines fitted to the projection profiles).
+        draw_overlay (bool): Copy the image and draw the lines on it. Turn off
+            when only the matrix is needed to skip a full-size copy.
+
+    Returns:
+        tuple: (matrix, overlay_image) or (matrix, overlay_image, confidence)
+    """
+    if line_method not in LINE_METHODS:
+        raise ValueError(f"Unknown line_method {line_method!r}, expected one of {sorted(LINE_METHODS)}")
+
+    gray = to_grayscale(image)
+    # Binarize (invert so lines are white)
+    binary = cv2.adaptiveThreshold(~gray, 255, 
+                                   cv2.ADAPTIVE_THRESH_MEAN_C, 
+                                   cv2.THRESH_BINARY, 15, -2)
+
+    x_lines, y_lines = LINE_METHODS[line_method](binary)
+
+    # Classify every cell in one pass over the integral image
+    matrix, confidence = classify_cells(gray, x_lines, y_lines)
+
+    overlay = None
+    if draw_overlay:
+        # Copy for overlay
+        overlay = image.copy() if image.ndim == 3 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+        # Draw detected grid lines on overlay
+        for x in x_lines:
+            cv2.line(overlay, (x, 0), (x, overlay.shape[0]), (0, 0, 255), 1)
+        for y in y_lines:
+            cv2.line(overlay, (0, y), (overlay.shape[1], y), (0, 0, 255), 1)
+
+    if return_confidence:
+        return matrix, overlay, confidence
     return matrix, overlay
 
 def number_crossword_grid(matrix):
@@ -237,6 +505,75 @@ def number_crossword_grid(matrix):
     
     return numbers_matrix, across_clues, down_clues
 
+def _find_runs(white):
+    """
+    Finds horizontal runs of answer cells of length >= 2 with NumPy shifts.
+
+    Returns:
+        tuple: (rows, cols, lengths) arrays, one entry per run, in row-major order.
+    """
+    n_rows, n_cols = white.shape
+    # A black column on the right stops runs continuing onto the next row
+    flat = np.pad(white, ((0, 0), (0, 1))).ravel()
+    prev = np.concatenate(([False], flat[:-1]))
+    nxt = np.concatenate((flat[1:], [False]))
+    starts = np.flatnonzero(flat & ~prev)
+    ends = np.flatnonzero(flat & ~nxt)
+    lengths = ends - starts + 1
+
+    keep = lengths >= 2
+    rows, cols = np.divmod(starts[keep], n_cols + 1)
+    return rows, cols, lengths[keep]
+
+def build_slot_table(matrix, numbers_matrix):
+    """
+    Builds the slot table for a grid so later stages never rescan the matrix.
+
+    Each slot is a dict with:
+        id: index into the table (across slots first, then down, by number)
+        number, direction ("across"/"down"), row, col, length
+        cells: flat cell indices (row * n_cols + col) from first to last letter
+        crossings: for each cell, the id of the crossing slot, or -1 if unchecked
+
+    Args:
+        matrix (np.ndarray): 0 = black cell, 1 = answer cell.
+        numbers_matrix (np.ndarray): Clue numbers from number_crossword_grid.
+
+    Returns:
+        list: slot dicts.
+    """
+    white = np.asarray(matrix) == 1
+    n_rows, n_cols = white.shape
+    numbers_matrix = np.asarray(numbers_matrix)
+
+    across = _find_runs(white)
+    # Down runs are across runs of the transposed grid
+    down_cols, down_rows, down_lengths = _find_runs(white.T)
+    down_order = np.lexsort((down_cols, down_rows))
+    down = (down_rows[down_order], down_cols[down_order], down_lengths[down_order])
+
+    slots = []
+    slot_of_cell = {"across": np.full(n_rows * n_cols, -1), "down": np.full(n_rows * n_cols, -1)}
+    for direction, (rows, cols, lengths), step in (("across", across, 1), ("down", down, n_cols)):
+        for r, c, length in zip(rows.tolist(), cols.tolist(), lengths.tolist()):
+            cells = r * n_cols + c + step * np.arange(length)
+            slot_of_cell[direction][cells] = len(slots)
+            slots.append({
+                "id": len(slots),
+                "number": int(numbers_matrix[r, c]),
+                "direction": direction,
+                "row": r,
+                "col": c,
+                "length": length,
+                "cells": cells.tolist(),
+            })
+
+    for slot in slots:
+        other = "down" if slot["direction"] == "across" else "across"
+        slot["crossings"] = slot_of_cell[other][slot["cells"]].tolist()
+
+    return slots
+
 # Utility function to draw bounding box on image for visualization
 def draw_bounding_box(image, bounding_box_coords, color=(0, 255, 0), thickness=2):
     try:
@@ -247,92 +584,179 @@ def draw_bounding_box(image, bounding_box_coords, color=(0, 255, 0), thickness=2
         print(f"An error occurred: {e}")
         return None
 
-def get_crossword_grid_array(image):
+def grid_is_plausible(matrix, warped, min_cells=3, max_grid_aspect=2.0, max_cell_aspect=1.5):
     """
-    End-to-end wrapper to detect crossword grid and return:
-    - grid_matrix: 0 = black cell, 1 = answer cell
-    - number_matrix: 0 = no clue number, >0 = clue number
-    - across_clues, down_clues (lists of clue starts)
-    
+    Sanity check for a detected grid: enough rows and columns, a roughly square
+    grid of roughly square cells and at least one answer cell. Used to reject a
+    bad coarse locate, which typically clips the grid to a strip of rows.
+
     Args:
-        image (np.ndarray): OpenCV image array (BGR).
-    
+        matrix (np.ndarray): Detected grid (0 = black cell, 1 = answer cell).
+        warped (np.ndarray): Rectified grid image the matrix was sampled from.
+
     Returns:
-        tuple: (grid_matrix, number_matrix, across_clues, down_clues)
+        bool: True if the grid looks like a crossword.
     """
-    if image is None or not isinstance(image, np.ndarray):
-        raise ValueError("Input must be a valid OpenCV image (numpy.ndarray)")
-
-    # Step 1: find bounding box
-    grid_bbox = find_crossword_bounding_box(image)
+    rows, cols = matrix.shape[:2]
+    if rows < min_cells or cols < min_cells or not matrix.any():
+        return False
+    if max(rows, cols) > max_grid_aspect * min(rows, cols):
+        return False
+    cell_aspect = (warped.shape[1] / cols) / (warped.shape[0] / rows)
+    return 1 / max_cell_aspect <= cell_aspect <= max_cell_aspect
+
+def _locate_and_detect(gray, pyramid_levels, line_method, timings, debug_images):
+    """Find, warp and read the grid; returns (grid_matrix, warped, grid_bbox, confidence)."""
+    # Step 1: find bounding box (and corners when working coarse-to-fine)
+    t0 = time.perf_counter()
+    if pyramid_levels > 0:
+        grid_bbox, rect = locate_crossword_grid_coarse(gray, pyramid_levels)
+    else:
+        grid_bbox = find_crossword_bounding_box(gray)
+        rect = None
+    timings["bbox"] = time.perf_counter() - t0
     if grid_bbox is None:
         raise RuntimeError("Failed to find crossword bounding box")
     x, y, w, h = grid_bbox
 
-    cropped = image[y:y+h, x:x+w]
+    cropped = gray[y:y+h, x:x+w]
 
-    # Step 2: warp
-    warped = find_and_warp_crossword_grid(cropped)
-    if warped is None:
+    # Step 2: warp (in pyramid mode the corners are already known)
+    t0 = time.perf_counter()
+    if pyramid_levels <= 0:
+        rect = find_crossword_corners(cropped)
+    if rect is None:
         raise RuntimeError("Failed to warp crossword grid")
+    warped = warp_crossword_grid(cropped, rect)
+    timings["warp"] = time.perf_counter() - t0
 
     # Step 3: detect grid (matrix + overlay)
-    grid_matrix, overlay = detect_crossword_grid(warped)
+    t0 = time.perf_counter()
+    grid_matrix, overlay, confidence = detect_crossword_grid(
+        warped, return_confidence=True, line_method=line_method, draw_overlay=debug_images is not None
+    )
+    timings["detect"] = time.perf_counter() - t0
+    if debug_images is not None:
+        debug_images["warped"] = warped
+        debug_images["overlay"] = overlay
+    return grid_matrix, warped, grid_bbox, confidence
+
+def get_crossword_grid_array(image, pyramid_levels=0, line_method="morphology", timings=None,
+                             debug_images=None, return_confidence=False):
+    """
+    End-to-end wrapper to detect crossword grid and return:
+    - grid_matrix: 0 = black cell, 1 = answer cell
+    - number_matrix: 0 = no clue number, >0 = clue number
+    - across_clues, down_clues (lists of clue starts)
+    
+    The page is converted to grayscale once and shared by every stage.
+    
+    Args:
+        image (np.ndarray): OpenCV image array (BGR or grayscale).
+        pyramid_levels (int): If > 0, find the bounding box and corners on an image
+            downscaled this many times, and only warp and sample cells at full resolution.
+            Falls back to the full-resolution path if that grid fails grid_is_plausible.
+        line_method (str): Grid line engine passed to detect_crossword_grid.
+        timings (dict): If given, filled with the seconds spent in each stage
+            ("bbox", "warp", "detect", "number").
+        debug_images (dict): If given, filled with the "warped" grid and the line
+            "overlay". The overlay is only drawn when this is passed.
+        return_confidence (bool): Also return the per-cell confidence array
+            (see classify_cells), aligned with grid_matrix.
+    
+    Returns:
+        tuple: (grid_matrix, number_matrix, across_clues, down_clues, grid_bbox),
+            with confidence appended when return_confidence is set
+    """
+    if image is None or not isinstance(image, np.ndarray):
+        raise ValueError("Input must be a valid OpenCV image (numpy.ndarray)")
+    if timings is None:
+        timings = {}
+
+    gray = to_grayscale(image)
+
+    result = None
+    if pyramid_levels > 0:
+        try:
+            result = _locate_and_detect(gray, pyramid_levels, line_method, timings, debug_images)
+        except RuntimeError:
+            result = None
+        # The coarse corners can miss on blurred or warped scans by more than the
+        # refinement window covers; redo the page at full resolution when they do
+        if result is not None and not grid_is_plausible(result[0], result[1]):
+            result = None
+    if result is None:
+        result = _locate_and_detect(gray, 0, line_method, timings, debug_images)
+    grid_matrix, warped, grid_bbox, confidence = result
 
     # Step 4: assign clue numbers
+    t0 = time.perf_counter()
     number_matrix, across_clues, down_clues = number_crossword_grid(grid_matrix)
+    timings["number"] = time.perf_counter() - t0
 
+    if return_confidence:
+        return grid_matrix, number_matrix, across_clues, down_clues, grid_bbox, confidence
     return grid_matrix, number_matrix, across_clues, down_clues, grid_bbox
 
 
-# Example usage
-image_file_name = Path('dataset/images/daily-1994-02-Feb0494.png')
-output_warped_image_path = Path('grid-detection/crossword_warped.png')
-output_bbox_image_path = Path('grid-detection/crossword_detected.png')
+def main(argv=None):
+    """
+    Command-line entry point: detect the grid in a page image and print the matrices.
 
-# Load the original image
-original_image = cv2.imread(str(image_file_name))
+    Example:
+        python grid_detect.py dataset/images/daily-1994-02-Feb0494.png --bbox-out detected.png
+    """
+    parser = argparse.ArgumentParser(description="Detect the crossword grid in a page image.")
+    parser.add_argument("image", type=Path, help="Path to the page image")
+    parser.add_argument("--pyramid-levels", type=int, default=0,
+                        help="Locate the grid on an image downscaled this many times (default: 0)")
+    parser.add_argument("--line-method", choices=sorted(LINE_METHODS), default="morphology",
+                        help="Grid line detection engine (default: morphology)")
+    parser.add_argument("--bbox-out", type=Path,
+                        help="Save the page with the detected bounding box drawn")
+    parser.add_argument("--overlay-out", type=Path,
+                        help="Save the warped grid with the detected grid lines drawn")
+    args = parser.parse_args(argv)
+
+    # Load the original image
+    original_image = cv2.imread(str(args.image))
+    if original_image is None:
+        print(f"Error: Could not load image from {args.image}")
+        return 1
 
-if original_image is not None:
-    # Step 1: Find the bounding box of the crossword
-    bounding_box_coords = find_crossword_bounding_box(original_image)
-    
-    if bounding_box_coords:
-        x, y, w, h = bounding_box_coords
-        print(f"Bounding box found: x={x}, y={y}, width={w}, height={h}")
+    try:
+        grid_matrix, number_matrix, across_clues, down_clues, grid_bbox = get_crossword_grid_array(
+            original_image, pyramid_levels=args.pyramid_levels, line_method=args.line_method
+        )
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    x, y, w, h = grid_bbox
+    print(f"Bounding box found: x={x}, y={y}, width={w}, height={h}")
+    print(grid_matrix)
+    print(number_matrix)
+    print(f"{len(across_clues)} across clues, {len(down_clues)} down clues")
 
+    if args.bbox_out:
         # Draw the bounding box on the original image for visualization
-        processed_image = draw_bounding_box(original_image.copy(), bounding_box_coords)
+        processed_image = draw_bounding_box(original_image.copy(), grid_bbox)
         if processed_image is not None:
-            cv2.imwrite(output_bbox_image_path, processed_image)
-            print(f"Image with bounding box saved to {output_bbox_image_path}")
-
-        # Crop the original image to just the crossword grid
-        cropped_image = original_image[y:y+h, x:x+w]
-        
-        # Step 2: Find the 4 corners and warp the cropped image
-        warped_image = find_and_warp_crossword_grid(cropped_image)
-        # cv2.imwrite(str(output_warped_image_path), warped_image)
-        
-        if warped_image is not None:
-            # Detect and draw the grid lines on the image
-            grid_image = detect_crossword_grid(warped_image)
-            
-            if grid_image is not None:
-                # cv2.imwrite(str(output_warped_image_path), grid_image)
-                print(f"Final grid lines detected and saved to {output_warped_image_path}")
-
-                matrix, overlay = detect_crossword_grid(warped_image)
-                print(matrix)
-                cv2.imwrite('grid-detection/crossword_overlay.png', overlay)
-            else:
-                print("Failed to detect grid lines on the warped image.")
+            cv2.imwrite(str(args.bbox_out), processed_image)
+            print(f"Image with bounding box saved to {args.bbox_out}")
 
+    if args.overlay_out:
+        # Re-run the warp on the colour crop so the overlay keeps the page colours
+        warped_image = find_and_warp_crossword_grid(original_image[y:y+h, x:x+w])
+        if warped_image is not None:
+            _, overlay = detect_crossword_grid(warped_image, line_method=args.line_method)
+            cv2.imwrite(str(args.overlay_out), overlay)
+            print(f"Grid overlay saved to {args.overlay_out}")
         else:
             print("Failed to warp the image. Check if 4 corners were detected.")
 
-    else:
-        print("Failed to find the crossword bounding box.")
+    return 0
+
 
-else:
-    print(f"Error: Could not load image from {image_file_name}")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
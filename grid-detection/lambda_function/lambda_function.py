@@ -1,32 +1,225 @@
+import base64
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from botocore.config import Config
 import cv2
 import numpy as np
-from grid_detect import get_crossword_grid_array
+from grid_detect import build_slot_table, get_crossword_grid_array
+from instrumentation import emit_timings, instrumented_handler, span
+from result_cache import GridResultCache, content_key, etag_key
+from stores import DiskStore, S3Store
 
-s3 = boto3.client("s3")
+# Locate the grid on a page downscaled this many times; 0 runs every stage at full
+# resolution. Pages whose coarse grid fails grid_is_plausible are redone at full
+# resolution, so the default only trades away time on pages that need the fallback
+pyramid_levels = int(os.environ.get("GRID_PYRAMID_LEVELS", "2"))
+
+# Cells whose confidence (0 at the black/white threshold, 1 for pure black or
+# white) falls below this are listed in the response as "low_confidence_cells"
+low_confidence = float(os.environ.get("GRID_LOW_CONFIDENCE", "0.25"))
+
+# Grid line engine: "morphology" (erode/dilate) or "lattice" (projection-profile fit)
+line_method = os.environ.get("GRID_LINE_METHOD", "morphology")
+
+# Worker threads for batch requests. S3 reads and OpenCV both release the GIL,
+# so threads overlap downloads with detection without extra processes
+batch_workers = int(os.environ.get("GRID_BATCH_WORKERS", str(min(8, (os.cpu_count() or 1) * 2))))
+
+# Clients are created on first use so a cold start only pays for the imports
+_s3 = None
+_client_lock = threading.Lock()
+
+def get_s3_client():
+    global _s3
+    with _client_lock:
+        if _s3 is None:
+            # One pooled connection per batch worker so concurrent reads don't queue
+            _s3 = boto3.client("s3", config=Config(max_pool_connections=max(10, batch_workers)))
+    return _s3
+
+_grid_cache = None
+
+def get_grid_cache():
+    """
+    Result cache keyed by S3 ETag. The in-memory tier survives warm invocations;
+    GRID_CACHE_DIR (e.g. /tmp/grid-cache) or GRID_CACHE_BUCKET/GRID_CACHE_PREFIX
+    add a persistent tier.
+    """
+    global _grid_cache
+    with _client_lock:
+        if _grid_cache is not None:
+            return _grid_cache
+    store = None
+    if os.environ.get("GRID_CACHE_BUCKET"):
+        store = S3Store(get_s3_client(), os.environ["GRID_CACHE_BUCKET"],
+                        os.environ.get("GRID_CACHE_PREFIX", "grid-cache/"))
+    elif os.environ.get("GRID_CACHE_DIR"):
+        store = DiskStore(os.environ["GRID_CACHE_DIR"])
+    with _client_lock:
+        if _grid_cache is None:
+            _grid_cache = GridResultCache(int(os.environ.get("GRID_CACHE_SIZE", "128")), store)
+    return _grid_cache
+
+def detect_grid_from_s3(bucket, key, pyramid_levels=pyramid_levels, use_cache=True, line_method=line_method,
+                        debug=False):
+    """
+    Downloads one page image from S3 and runs grid detection on it.
+    Results are cached by ETag, so a repeated page skips both the download and detection.
+    With debug=True the cache is bypassed and a base64 PNG "overlay_png" is added.
+
+    Returns:
+        dict: grid_matrix, number_matrix, across_clues, down_clues, grid_bbox, slots,
+            min_confidence and low_confidence_cells ([row, col] pairs).
+    """
+    # The ETag arrives with the response headers, before the body is read
+    with span("s3_fetch"):
+        obj = get_s3_client().get_object(Bucket=bucket, Key=key)
+    etag = obj.get("ETag")
+    if debug or not use_cache or not etag:
+        return _detect_grid(_read_body(obj), pyramid_levels, line_method, debug)
 
-def lambda_handler(event, context):
     try:
-        bucket = event["bucket"]
-        key = event["key"]
+        result = get_grid_cache().get_or_compute(
+            etag_key(etag, pyramid_levels, line_method),
+            lambda: _detect_grid(_read_body(obj), pyramid_levels, line_method)
+        )
+    finally:
+        obj["Body"].close()
+    # Callers may add keys to the response; keep the cached entry untouched
+    return dict(result)
 
-        # Download from S3
-        obj = s3.get_object(Bucket=bucket, Key=key)
-        img_bytes = obj["Body"].read()
+def _read_body(obj):
+    with span("s3_read") as fields:
+        body = obj["Body"].read()
+        fields["bytes"] = len(body)
+    return body
 
+def detect_grid_from_bytes(img_bytes, pyramid_levels=pyramid_levels, use_cache=True, line_method=line_method,
+                           debug=False, etag=None):
+    """
+    Runs grid detection on an already-downloaded image, cached by content hash,
+    or by S3 ETag when the caller has one (sharing entries with detect_grid_from_s3).
+
+    Returns:
+        dict: grid_matrix, number_matrix, across_clues, down_clues, grid_bbox, slots,
+            min_confidence and low_confidence_cells ([row, col] pairs).
+    """
+    if debug or not use_cache:
+        return _detect_grid(img_bytes, pyramid_levels, line_method, debug)
+    if etag:
+        key = etag_key(etag, pyramid_levels, line_method)
+    else:
+        key = content_key(img_bytes, pyramid_levels, line_method)
+    result = get_grid_cache().get_or_compute(
+        key,
+        lambda: _detect_grid(img_bytes, pyramid_levels, line_method)
+    )
+    return dict(result)
+
+def _detect_grid(img_bytes, pyramid_levels, line_method, debug=False):
+    with span("decode"):
         np_arr = np.frombuffer(img_bytes, np.uint8)
-        image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+        # Every stage works on grayscale, so decode straight to one channel
+        # (a third of the memory of a BGR page, and no cvtColor afterwards)
+        image = cv2.imdecode(np_arr, cv2.IMREAD_GRAYSCALE)
+        del np_arr, img_bytes
+
+    # The overlay is only drawn when debugging
+    debug_images = {} if debug else None
+
+    # Stage timings (bbox, warp, detect, number) are emitted as metric records
+    timings = {}
+    try:
+        grid_matrix, number_matrix, across_clues, down_clues, grid_bbox, confidence = get_crossword_grid_array(
+            image, pyramid_levels=pyramid_levels, line_method=line_method, timings=timings,
+            debug_images=debug_images, return_confidence=True
+        )
+    finally:
+        emit_timings(timings, line_method=line_method, pyramid_levels=pyramid_levels)
+
+    result = {
+        "grid_matrix": grid_matrix.tolist(),
+        "number_matrix": number_matrix.tolist(),
+        "across_clues": across_clues,
+        "down_clues": down_clues,
+        "grid_bbox": grid_bbox,
+        "slots": build_slot_table(grid_matrix, number_matrix),
+        "min_confidence": round(float(confidence.min()), 3) if confidence.size else 0.0,
+        "low_confidence_cells": np.argwhere(confidence < low_confidence).tolist()
+    }
+    if debug:
+        _, png = cv2.imencode(".png", debug_images["overlay"])
+        result["overlay_png"] = base64.b64encode(png.tobytes()).decode("ascii")
+    return result
+
+def _batch_item(key, future):
+    try:
+        return {"key": key, "statusCode": 200, **future.result()}
+    except Exception as e:
+        return {"key": key, "statusCode": 500, "error": str(e)}
+
+def iter_batch_results(bucket, keys, max_workers=None, pyramid_levels=pyramid_levels, use_cache=True,
+                       line_method=line_method, debug=False):
+    """
+    Runs detect_grid_from_s3 for many keys on a thread pool and yields one result
+    per key, in input order, as soon as it and every earlier key are finished.
+
+    Failures are reported per item ({"key", "statusCode": 500, "error"}) and do not
+    stop the batch. At most 2 * max_workers items are in flight, which bounds how
+    many downloaded pages are held in memory at once.
+    """
+    max_workers = max_workers or batch_workers
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for key in keys:
+            pending.append((key, pool.submit(detect_grid_from_s3, bucket, key, pyramid_levels, use_cache, line_method, debug)))
+            if len(pending) >= 2 * max_workers:
+                yield _batch_item(*pending.popleft())
+        while pending:
+            yield _batch_item(*pending.popleft())
+
+@instrumented_handler
+def lambda_handler(event, context):
+    """
+    Single page: {"bucket": ..., "key": ...}
+    Batch:       {"bucket": ..., "keys": [...], "max_workers": optional}
+    Set "use_cache": false to force detection to run again, or "debug": true to
+    also return the detected grid lines drawn on the warped grid ("overlay_png").
+
+    A batch response is buffered: the Python runtime has no response streaming,
+    so every page is detected before anything is returned and the batch must
+    fit in the function timeout. iter_batch_results is the incremental
+    interface for callers in the same process; submit bigger batches as
+    "grid-detection" jobs through pipeline/jobs.py.
+    """
+    try:
+        bucket = event["bucket"]
+        levels = int(event.get("pyramid_levels", pyramid_levels))
+        use_cache = event.get("use_cache", True)
+        method = event.get("line_method", line_method)
+        debug = bool(event.get("debug", False))
 
-        # Unpack the new return values
-        grid_matrix, number_matrix, across_clues, down_clues, grid_bbox = get_crossword_grid_array(image)
+        if "keys" in event:
+            # Buffered on purpose, see the docstring
+            results = list(iter_batch_results(
+                bucket, event["keys"], max_workers=event.get("max_workers"),
+                pyramid_levels=levels, use_cache=use_cache, line_method=method, debug=debug
+            ))
+            return {
+                "statusCode": 200,
+                "results": results,
+                "failed": sum(1 for r in results if r["statusCode"] != 200)
+            }
 
         return {
             "statusCode": 200,
-            "grid_matrix": grid_matrix.tolist(),
-            "number_matrix": number_matrix.tolist(),
-            "across_clues": across_clues,
-            "down_clues": down_clues,
-            "grid_bbox": grid_bbox     
+            **detect_grid_from_s3(
+                bucket, event["key"], pyramid_levels=levels, use_cache=use_cache, line_method=method,
+                debug=debug
+            )
         }
     except Exception as e:
         return {
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from stores import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of cached results changes so stale persisted entries are ignored
+CACHE_VERSION = 3
+
+def content_key(img_bytes, pyramid_levels=0, line_method="morphology"):
+    """Cache key for an image given its raw bytes and the detection settings."""
+    return f"v{CACHE_VERSION}-sha256-{hashlib.sha256(img_bytes).hexdigest()}-p{pyramid_levels}-{line_method}"
+
+def etag_key(etag, pyramid_levels=0, line_method="morphology"):
+    """
+    Cache key for an S3 object given its ETag, so a hit never downloads the body.
+    Single-part ETags are the MD5 of the content, so identical uploads share a key.
+    """
+    etag = etag.strip('"')
+    return f"v{CACHE_VERSION}-etag-{etag}-p{pyramid_levels}-{line_method}"
+
+class GridResultCache:
+    """
+    Two-tier cache for grid detection results.
+
+    Lookups go to the in-memory LRU first, then the optional persistent store
+    (any object with get(key) and put(key, bytes), e.g. stores.DiskStore or
+    stores.S3Store), which holds the results as JSON.
+    Concurrent requests for the same key are collapsed: one caller computes
+    and the others wait for its result.
+    """
+
+    def __init__(self, max_entries=128, store=None):
+        self.memory = LRUCache(max_entries)
+        self.store = store
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() at most once per key at a time."""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        with self._lock:
+            # Re-check under the lock: a leader may have just finished
+            value = self.memory.get(key)
+            if value is not None:
+                self.stats["memory_hits"] += 1
+                return value
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            data = self.store.get(key) if self.store is not None else None
+            value = json.loads(data) if data is not None else None
+            if value is not None:
+                self._count("store_hits")
+            else:
+                self._count("misses")
+                value = compute()
+                if self.store is not None:
+                    try:
+                        self.store.put(key, json.dumps(value).encode("utf-8"))
+                    except Exception as e:
+                        # The result is still valid; only persistence failed
+                        logger.warning("Failed to persist grid result %s: %s", key, e)
+            self.memory.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
@@ -0,0 +1,477 @@
+"""
+Asynchronous job interface for puzzles that outlive a synchronous API call.
+
+submit() stores a job record and queues its ID; a pool of worker threads
+takes IDs off the queue, runs the job through one of the existing handlers
+and writes progress and the result to the store, where get()/wait() poll it:
+
+    runner = JobRunner(SQLiteJobStore("jobs.db"), SQLiteQueue("jobs.db"), workers=4)
+    with runner:
+        job_id = runner.submit({"bucket": ..., "key": ...})
+        record = runner.wait(job_id)
+
+A job record is a dict: job_id, kind, status ("queued", "running",
+"succeeded", "failed"), payload, progress, result, error, attempts and the
+submitted_at/started_at/finished_at timestamps.
+
+The store is any object with create(record), update(job_id, **fields) and
+get(job_id); the queue any object with put(job_id), get(timeout) -> job_id or
+None, extend(job_id), ack(job_id) and a visibility_timeout (None if it never
+redelivers). The in-memory and SQLite versions here are stand-ins for a real
+queue and table (e.g. SQS and DynamoDB) so throughput can be load-tested
+offline. SQLiteQueue redelivers a job whose worker never acked it within
+visibility_timeout, so queued work survives a crash; while a job runs, its
+worker extends the lease every visibility_timeout / 3 so a long job is not
+handed to a second worker.
+
+From the command line (sqlite:PATH or memory for --store/--queue):
+    python jobs.py submit event.json --kind solver    ->  prints the job ID
+    python jobs.py run --workers 4                    ->  processes queued jobs
+    python jobs.py status <job_id>
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+JOB_FIELDS = ("job_id", "kind", "status", "payload", "progress", "result", "error", "attempts",
+              "submitted_at", "started_at", "finished_at")
+
+# Stored as JSON text in SQLiteJobStore
+JSON_FIELDS = ("payload", "progress", "result")
+
+logger = logging.getLogger(__name__)
+
+# Kinds provided by default_handlers()
+DEFAULT_KINDS = ("pipeline", "solver", "grid-detection", "clue-extraction")
+
+# The pipeline handler next to this file, whatever the working directory
+PIPELINE_HANDLER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lambda_function.py")
+
+def _use_wal(conn):
+    # Readers (pollers) don't block the writer, and a commit doesn't wait for fsync
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+class MemoryJobStore:
+    """Job records in a dict; lives as long as the process."""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def create(self, record):
+        with self._lock:
+            self._records[record["job_id"]] = dict(record)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._records[job_id].update(fields)
+
+    def get(self, job_id):
+        with self._lock:
+            record = self._records.get(job_id)
+            return dict(record) if record is not None else None
+
+class SQLiteJobStore:
+    """Job records in a SQLite file, readable from other processes while jobs run."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        _use_wal(self._conn)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, kind TEXT, status TEXT, payload TEXT, "
+            "progress TEXT, result TEXT, error TEXT, attempts INTEGER, submitted_at REAL, started_at REAL, "
+            "finished_at REAL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def create(self, record):
+        values = [json.dumps(record.get(f)) if f in JSON_FIELDS else record.get(f) for f in JOB_FIELDS]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))})", values
+            )
+            self._conn.commit()
+
+    def update(self, job_id, **fields):
+        unknown = set(fields) - set(JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        values = [json.dumps(v) if name in JSON_FIELDS else v for name, v in fields.items()]
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", values + [job_id])
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {f: json.loads(v) if f in JSON_FIELDS and v is not None else v for f, v in zip(JOB_FIELDS, row)}
+
+class MemoryQueue:
+    """FIFO of job IDs for workers in the same process; nothing is redelivered."""
+
+    visibility_timeout = None
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, job_id):
+        self._queue.put(job_id)
+
+    def get(self, timeout=None):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def extend(self, job_id):
+        pass
+
+    def ack(self, job_id):
+        pass
+
+class SQLiteQueue:
+    """
+    Durable FIFO of job IDs in a SQLite file, shareable between processes.
+
+    A received job stays in the table, hidden for visibility_timeout seconds,
+    until ack() deletes it; if the worker dies first it becomes visible again.
+    extend() restarts the timeout for a job that is still being worked on.
+    """
+
+    def __init__(self, path, visibility_timeout=900.0, poll_interval=0.05):
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        # Autocommit mode, so BEGIN IMMEDIATE below controls the transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        _use_wal(self._conn)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_queue (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "job_id TEXT NOT NULL, visible_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def put(self, job_id):
+        with self._lock:
+            self._conn.execute("INSERT INTO job_queue (job_id, visible_at) VALUES (?, 0)", (job_id,))
+
+    def _receive(self):
+        now = time.time()
+        with self._lock:
+            # Take the write lock before reading so two processes can't claim the same row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT seq, job_id FROM job_queue WHERE visible_at <= ? ORDER BY seq LIMIT 1", (now,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE job_queue SET visible_at = ? WHERE seq = ?",
+                                       (now + self.visibility_timeout, row[0]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[1] if row else None
+
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job_id = self._receive()
+            if job_id is not None:
+                return job_id
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def extend(self, job_id):
+        with self._lock:
+            self._conn.execute("UPDATE job_queue SET visible_at = ? WHERE job_id = ?",
+                               (time.time() + self.visibility_timeout, job_id))
+
+    def ack(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM job_queue WHERE job_id = ?", (job_id,))
+
+def open_store(spec):
+    """Open a job store from "memory" or "sqlite:PATH"."""
+    if spec == "memory":
+        return MemoryJobStore()
+    if spec.startswith("sqlite:"):
+        return SQLiteJobStore(spec[len("sqlite:"):])
+    raise ValueError(f"Unknown job store {spec!r}")
+
+def open_queue(spec):
+    """Open a job queue from "memory" or "sqlite:PATH"."""
+    if spec == "memory":
+        return MemoryQueue()
+    if spec.startswith("sqlite:"):
+        return SQLiteQueue(spec[len("sqlite:"):])
+    raise ValueError(f"Unknown job queue {spec!r}")
+
+def _lambda_result(response):
+    """Unwrap a handler's {"statusCode", "body"} response, raising on errors."""
+    body = response.get("body")
+    result = json.loads(body) if isinstance(body, str) else {k: v for k, v in response.items() if k != "statusCode"}
+    if response.get("statusCode", 200) != 200:
+        raise RuntimeError(result.get("error", f"Handler returned {response.get('statusCode')}"))
+    return result
+
+def _load_pipeline():
+    """Import pipeline/lambda_function.py by path, so it doesn't depend on sys.path or the cwd."""
+    module = sys.modules.get("pipeline_handler")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("pipeline_handler", PIPELINE_HANDLER)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["pipeline_handler"] = module
+        spec.loader.exec_module(module)
+    return module
+
+def default_handlers():
+    """
+    Job kind -> handler(payload, report). The event-streaming kinds pass every
+    progress event to report(event); the others report nothing until done.
+    """
+    # Loaded here so a runner with its own handlers doesn't load OpenCV or boto3
+    pipeline = _load_pipeline()
+
+    def run_pipeline(payload, report):
+        result = {}
+        for event in pipeline.iter_page_events(
+                payload["bucket"], payload["key"], payload.get("use_cache", True),
+                float(payload.get("tolerance", pipeline.clue_extraction.TOLERANCE)),
+                {name: payload[name] for name in pipeline.SOLVER_OPTIONS if name in payload}):
+            report(event)
+            if event["event"] == "grid" and event["stage"] == "detect":
+                result["grid_data"] = event["grid_data"]
+            elif event["event"] == "clues":
+                result["clues"] = {"across": event["across"], "down": event["down"]}
+            elif event["event"] == "done":
+                result.update(solution_grid=event["solution_grid"], stats=event["stats"])
+        return result
+
+    def run_solver(payload, report):
+        final = None
+        for event in pipeline.solver.solve_puzzle_events(payload):
+            report(event)
+            final = event
+        return {"solution_grid": final["solution_grid"], "stats": final["stats"]}
+
+    return {
+        "pipeline": run_pipeline,
+        "solver": run_solver,
+        "grid-detection": lambda payload, report: _lambda_result(
+            pipeline.grid_detection.lambda_handler(payload, None)),
+        "clue-extraction": lambda payload, report: _lambda_result(
+            pipeline.clue_extraction.lambda_handler(payload, None)),
+    }
+
+class _Progress:
+    """Summarises a job's events into its progress field, written at most every `interval` seconds."""
+
+    def __init__(self, store, job_id, interval):
+        self.store = store
+        self.job_id = job_id
+        self.interval = interval
+        self.state = {"events": 0, "stage": None, "answered_slots": 0, "filled_slots": None}
+        self._written = time.monotonic()
+
+    def __call__(self, event):
+        self.state["events"] += 1
+        self.state["stage"] = event.get("stage", event.get("event"))
+        if event.get("event") == "slot":
+            self.state["answered_slots"] += 1
+        elif "filled_slots" in event:
+            self.state["filled_slots"] = event["filled_slots"]
+        if time.monotonic() - self._written >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self.store.update(self.job_id, progress=dict(self.state))
+        self._written = time.monotonic()
+
+class JobRunner:
+    """
+    Submit/poll front end plus a worker pool over a job store and queue.
+
+    Args:
+        handlers: Job kind -> handler(payload, report) returning a JSON-serialisable
+            result (default_handlers() when omitted, loaded on first use).
+        workers: Worker threads; handlers are mostly waiting on S3, Textract or
+            Bedrock, so threads overlap them like the solver's own pool.
+        progress_interval: Minimum seconds between progress writes per job.
+        max_attempts: Deliveries of the same job (after a worker crash) before it fails.
+    """
+
+    def __init__(self, store, queue, handlers=None, workers=4, progress_interval=0.5, max_attempts=3):
+        self.store = store
+        self.queue = queue
+        self._handlers = handlers
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.max_attempts = max_attempts
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def handlers(self):
+        with self._lock:
+            if self._handlers is None:
+                self._handlers = default_handlers()
+        return self._handlers
+
+    def submit(self, payload, kind="pipeline"):
+        """Queue a job and return its ID straight away."""
+        # Checked without loading the default handlers, so submitting stays cheap
+        kinds = DEFAULT_KINDS if self._handlers is None else self._handlers
+        if kind not in kinds:
+            raise ValueError(f"Unknown job kind {kind!r}; expected one of {sorted(kinds)}")
+        job_id = uuid.uuid4().hex
+        self.store.create({
+            "job_id": job_id, "kind": kind, "status": "queued", "payload": payload, "progress": None,
+            "result": None, "error": None, "attempts": 0, "submitted_at": time.time(),
+            "started_at": None, "finished_at": None
+        })
+        self.queue.put(job_id)
+        return job_id
+
+    def get(self, job_id):
+        """The job's current record, or None for an unknown ID."""
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout=None, poll_interval=0.1):
+        """Poll until the job has finished (or timeout passes) and return its record."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            record = self.store.get(job_id)
+            if record is None or record["status"] in ("succeeded", "failed"):
+                return record
+            if deadline is not None and time.monotonic() >= deadline:
+                return record
+            time.sleep(poll_interval)
+
+    def start(self):
+        self._stop.clear()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop taking new jobs and wait for the running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _work(self):
+        while not self._stop.is_set():
+            job_id = self.queue.get(timeout=0.2)
+            if job_id is not None:
+                self.run_job(job_id)
+
+    def run_job(self, job_id):
+        """Run one queued job to completion and record the outcome."""
+        record = self.store.get(job_id)
+        if record is None or record["status"] in ("succeeded", "failed"):
+            # Unknown, or a redelivery of a job that already finished
+            self.queue.ack(job_id)
+            return
+        attempts = (record["attempts"] or 0) + 1
+        if attempts > self.max_attempts:
+            self.store.update(job_id, status="failed", finished_at=time.time(),
+                              error=f"Gave up after {self.max_attempts} attempts")
+            self.queue.ack(job_id)
+            return
+
+        self.store.update(job_id, status="running", attempts=attempts, started_at=time.time())
+        progress = _Progress(self.store, job_id, self.progress_interval)
+        done = threading.Event()
+        heartbeat = None
+        if self.queue.visibility_timeout:
+            heartbeat = threading.Thread(target=self._keep_leased, args=(job_id, done),
+                                         name=f"job-lease-{job_id}", daemon=True)
+            heartbeat.start()
+        try:
+            result = self.handlers[record["kind"]](record["payload"], progress)
+        except Exception as e:
+            progress.flush()
+            self.store.update(job_id, status="failed", error=str(e), finished_at=time.time())
+        else:
+            progress.flush()
+            self.store.update(job_id, status="succeeded", result=result, finished_at=time.time())
+        finally:
+            done.set()
+            if heartbeat is not None:
+                heartbeat.join()
+        self.queue.ack(job_id)
+
+    def _keep_leased(self, job_id, done):
+        """Extend the job's queue lease until done is set, so a long job is not redelivered."""
+        interval = self.queue.visibility_timeout / 3
+        while not done.wait(interval):
+            try:
+                self.queue.extend(job_id)
+            except Exception as e:
+                # A missed extension only risks a redelivery; keep trying
+                logger.warning("Failed to extend the lease on job %s: %s", job_id, e)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Submit, run and poll asynchronous puzzle jobs.")
+    parser.add_argument("--store", default="sqlite:jobs.db", help='"memory" or "sqlite:PATH"')
+    parser.add_argument("--queue", default="sqlite:jobs.db", help='"memory" or "sqlite:PATH"')
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="Queue the job in a JSON event file")
+    submit.add_argument("event", help="Handler event JSON file")
+    submit.add_argument("--kind", default="pipeline", help="pipeline, solver, grid-detection or clue-extraction")
+    status = commands.add_parser("status", help="Print a job record")
+    status.add_argument("job_id")
+    run = commands.add_parser("run", help="Process queued jobs until interrupted")
+    run.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    store = open_store(args.store)
+    if args.command == "status":
+        record = store.get(args.job_id)
+        print(json.dumps(record, indent=2))
+        return 0 if record is not None else 1
+
+    runner = JobRunner(store, open_queue(args.queue), workers=getattr(args, "workers", 1))
+    if args.command == "submit":
+        with open(args.event) as f:
+            print(runner.submit(json.load(f), kind=args.kind))
+        return 0
+
+    runner.start()
+    print(f"Processing jobs with {runner.workers} workers; Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping after the running jobs finish")
+        runner.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
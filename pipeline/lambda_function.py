@@ -0,0 +1,160 @@
+"""
+Single-pass puzzle pipeline: one page image in S3 -> grid, clues and solution.
+
+Instead of three API calls that each read the same S3 object, the page is
+downloaded once, grid detection and Textract run concurrently on it, the
+clues are filtered against the detected grid afterwards, and the structured
+results go straight into the solver.
+
+The stage logic is the grid detection, clue extraction and solver Lambdas'
+own. terraform/utils/build_pipeline_function_zip.sh copies their modules into
+one package, with each handler module renamed (grid_detection_handler,
+clue_extraction_handler, solver_handler); run from the repository, they are
+loaded from their own directories instead.
+
+Local use:
+    python lambda_function.py <bucket> <key>  ->  NDJSON progress events on stdout
+"""
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HANDLER_DIRS = {
+    "grid_detection_handler": os.path.join("grid-detection", "lambda_function"),
+    "clue_extraction_handler": "clue-extraction",
+    "solver_handler": "solver",
+}
+
+def _load_handler(name):
+    """Import a stage's handler module, from the package or from its directory in the repo."""
+    if importlib.util.find_spec(name) is not None:
+        return importlib.import_module(name)
+    directory = os.path.join(REPO_ROOT, HANDLER_DIRS[name])
+    # Its sibling modules (grid_detect, textract_cache, fill, ...) have unique names
+    if directory not in sys.path:
+        sys.path.append(directory)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, "lambda_function.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+grid_detection = _load_handler("grid_detection_handler")
+clue_extraction = _load_handler("clue_extraction_handler")
+solver = _load_handler("solver_handler")
+
+from image_size import read_image_size
+from instrumentation import instrumented_handler, span
+
+def iter_page_events(bucket, key, use_cache=True, tolerance=clue_extraction.TOLERANCE, solver_options=None,
+                     deadline=None):
+    """
+    Run the whole pipeline on one page, yielding JSON-serialisable events:
+
+        {"event": "grid", "stage": "detect", "grid_data"}      grid detection result
+        {"event": "clues", "across", "down"}                   clues outside the grid
+        ...then every event of the solver's solve_puzzle_events, ending with "done".
+
+    Args:
+        solver_options: Extra solver event keys (batch_size, candidates, requery_waves, ...).
+        deadline: Optional time.monotonic() value passed on to the solver.
+    """
+    with span("s3_fetch") as fields:
+        obj = grid_detection.get_s3_client().get_object(Bucket=bucket, Key=key)
+        img_bytes = obj["Body"].read()
+        fields["bytes"] = len(img_bytes)
+    etag = obj.get("ETag")
+
+    # OpenCV releases the GIL and Textract is a network call, so two threads overlap them
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        grid_future = pool.submit(grid_detection.detect_grid_from_bytes, img_bytes, use_cache=use_cache,
+                                  etag=etag)
+        blocks_future = pool.submit(clue_extraction.analyze_page, bucket, key, use_cache=use_cache,
+                                    etag=etag, image_bytes=img_bytes)
+        width, height = read_image_size(img_bytes)
+        grid_data = grid_future.result()
+        blocks = blocks_future.result()
+    del img_bytes
+    yield {"event": "grid", "stage": "detect", "grid_data": grid_data}
+
+    grid_bbox = clue_extraction.normalize_bbox(grid_data["grid_bbox"], bucket, key, width, height)
+    with span("extract"):
+        across_clues, down_clues = clue_extraction.extract_clues(blocks, grid_bbox, tolerance)
+    yield {"event": "clues", "across": across_clues, "down": down_clues}
+
+    puzzle = {
+        "use_cache": use_cache,
+        **(solver_options or {}),
+        "clues": {"across": across_clues, "down": down_clues},
+        "grid_data": grid_data
+    }
+    yield from solver.solve_puzzle_events(puzzle, deadline=deadline)
+
+def solve_page(bucket, key, use_cache=True, tolerance=clue_extraction.TOLERANCE, solver_options=None,
+               deadline=None):
+    """
+    Local entry point: run the pipeline on one page and return the combined result.
+
+    Returns:
+        dict: grid_data, clues {"across", "down"}, solution_grid and stats.
+    """
+    result = {}
+    for event in iter_page_events(bucket, key, use_cache, tolerance, solver_options, deadline):
+        if event["event"] == "grid" and event["stage"] == "detect":
+            result["grid_data"] = event["grid_data"]
+        elif event["event"] == "clues":
+            result["clues"] = {"across": event["across"], "down": event["down"]}
+        elif event["event"] == "done":
+            result["solution_grid"] = event["solution_grid"]
+            result["stats"] = event["stats"]
+    return result
+
+SOLVER_OPTIONS = ("batch_size", "candidates", "requery_waves")
+
+@instrumented_handler
+def lambda_handler(event, context):
+    """
+    Body: {"bucket", "key", "tolerance": optional, "use_cache": optional (default true),
+    "batch_size"/"candidates"/"requery_waves": optional solver settings}
+
+    Returns {grid_data, clues, solution_grid, stats} once the page is solved;
+    iter_page_events, the local CLI and "pipeline" jobs in jobs.py report
+    progress as it happens. Like the solver, model calls stop
+    SOLVER_DEADLINE_MARGIN_MS before the invocation times out.
+    """
+    # If invoked via API Gateway, body will be a JSON string
+    body = json.loads(event["body"]) if "body" in event else event
+
+    try:
+        deadline = None
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            deadline = time.monotonic() + (context.get_remaining_time_in_millis()
+                                           - solver.deadline_margin_ms) / 1000
+        args = (
+            body["bucket"], body["key"], body.get("use_cache", True),
+            float(body.get("tolerance", clue_extraction.TOLERANCE)),
+            {name: body[name] for name in SOLVER_OPTIONS if name in body}, deadline
+        )
+        return {
+            "statusCode": 200,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps(solve_page(*args))
+        }
+    except Exception as e:
+        solver.logger.exception("Error while running the puzzle pipeline")
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
+
+if __name__ == "__main__":
+    from instrumentation import set_sink
+    # Keep stdout for the events; metric records go to stderr
+    set_sink(lambda record: sys.stderr.write(json.dumps(record) + "\n"))
+    for progress in iter_page_events(sys.argv[1], sys.argv[2]):
+        print(json.dumps(progress), flush=True)
@@ -0,0 +1,57 @@
+"""
+Parses clue lines such as "12. Some clue (3,4)" into structured records.
+
+Packaged with clue-extraction and the solver (each Lambda is deployed on its
+own); see shared/stores.py for how.
+"""
+import re
+
+# "12. Clue", "12 Clue", "12) Clue" or "12: Clue"
+CLUE_PATTERN = re.compile(r"^\s*(\d+)\s*[.):]?\s*(.*?)\s*$", re.DOTALL)
+
+# Trailing enumeration: "(5)", "(3,4)", "(2-3)", "(3 4)"
+ENUMERATION_PATTERN = re.compile(r"\s*\(\s*(\d+(?:\s*[,\-\s]\s*\d+)*)\s*\)\s*$")
+SEPARATOR_PATTERN = re.compile(r"\s*([,\-])\s*|\s+")
+
+def parse_clue(line, direction):
+    """
+    Parse one clue line.
+
+    Returns:
+        dict: {"number", "direction", "text", "enumeration"} (enumeration is None
+        when the clue has none), or None if the line does not start with a number.
+    """
+    match = CLUE_PATTERN.match(line)
+    if not match:
+        return None
+    text = match.group(2)
+    enumeration = None
+    enum_match = ENUMERATION_PATTERN.search(text)
+    if enum_match:
+        # Normalise separators: "3 , 4" -> "3,4", "3 4" -> "3,4"
+        enumeration = SEPARATOR_PATTERN.sub(lambda m: m.group(1) or ",", enum_match.group(1))
+        text = text[:enum_match.start()]
+    return {
+        "number": int(match.group(1)),
+        "direction": direction,
+        "text": text,
+        "enumeration": enumeration
+    }
+
+def index_clues(clues, direction):
+    """
+    Build {number: record} from parsed records or raw clue strings.
+    When a number appears twice the first clue wins.
+    """
+    index = {}
+    for clue in clues:
+        record = clue if isinstance(clue, dict) else parse_clue(clue, direction)
+        if record is not None:
+            index.setdefault(int(record["number"]), record)
+    return index
+
+def clue_prompt_text(record):
+    """The clue as shown to a solver: text plus enumeration, without the number."""
+    if record.get("enumeration"):
+        return f"{record['text']} ({record['enumeration']})"
+    return record["text"]
@@ -0,0 +1,161 @@
+"""
+Lightweight per-stage instrumentation shared by the Lambdas.
+
+    with span("s3_fetch", key=key):
+        ...
+
+times the block and emits one structured metric record, a JSON line in
+CloudWatch Embedded Metric Format, so the durations become metrics
+(namespace METRICS_NAMESPACE, dimensions service + stage) without any
+agent or extra API calls. Extra keyword fields, and anything the block adds
+to the dict the span yields, are attached to the record as properties.
+
+    METRICS_ENABLED=0         stop emitting records (spans still time the block)
+    METRICS_NAMESPACE         CloudWatch namespace (default "Crossword")
+    PROFILE_SAMPLE_RATE=0.05  run 5% of invocations under cProfile
+    PROFILE_DIR               also dump sampled profiles there as .prof files
+    PROFILE_TOP=25            profile lines written to the log
+
+Every Lambda package ships this module; see shared/stores.py for how.
+"""
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+SERVICE = os.environ.get("METRICS_SERVICE") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "local")
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "Crossword")
+metrics_enabled = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+profile_sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+profile_dir = os.environ.get("PROFILE_DIR")
+profile_top = int(os.environ.get("PROFILE_TOP", "25"))
+
+logger = logging.getLogger(__name__)
+
+# Only one profiler can be active per process (Python 3.12 raises on a second
+# enable()), and the job runner calls handlers from several threads
+_profile_lock = threading.Lock()
+
+def _write(record):
+    # A single write per record keeps lines from interleaving across threads
+    sys.stdout.write(json.dumps(record, default=str) + "\n")
+
+_sink = _write
+
+def set_sink(sink):
+    """Send metric records to sink(record) instead of stdout, e.g. list.append in a benchmark."""
+    global _sink
+    _sink = sink or _write
+
+def emit_metric(stage, value, unit="Milliseconds", name="duration", **fields):
+    """Emit one metric record for `stage`; extra fields become searchable properties."""
+    if not metrics_enabled:
+        return
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["service", "stage"]],
+                "Metrics": [{"Name": name, "Unit": unit}]
+            }]
+        },
+        "service": SERVICE,
+        "stage": stage,
+        name: value,
+        **fields
+    }
+    _sink(record)
+
+def emit_timings(timings, prefix="", **fields):
+    """Emit a stage -> seconds dict (such as get_crossword_grid_array's timings) as durations."""
+    for stage, seconds in timings.items():
+        emit_metric(prefix + stage, round(seconds * 1000, 3), **fields)
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Time the enclosed block and emit its duration in milliseconds.
+
+    Yields the record's property dict so the block can attach results (token
+    counts, cache hits). A block that raises is still recorded, with "error" set.
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        emit_metric(stage, round((time.perf_counter() - start) * 1000, 3), **fields)
+
+def _dump_profile(profiler, name):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(profile_top)
+    print(f"Profile of {name}:\n{stream.getvalue()}")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{name}-{int(time.time() * 1000)}.prof")
+        stats.dump_stats(path)
+        print(f"Profile saved to {path}")
+
+def instrumented_handler(handler):
+    """
+    Wrap a Lambda handler in a "handler" span and, for a PROFILE_SAMPLE_RATE
+    fraction of invocations, run it under cProfile. cProfile only sees the
+    handler's own thread; time spent in worker pools shows up as waits.
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        profiler = None
+        # Skip the sample if another invocation is being profiled
+        if profile_sample_rate > 0 and random.random() < profile_sample_rate and _profile_lock.acquire(blocking=False):
+            profiler = _start_profile()
+            if profiler is None:
+                _profile_lock.release()
+        try:
+            with span("handler", cold_start=_cold_start()) as fields:
+                if profiler is not None:
+                    fields["profiled"] = True
+                result = handler(event, context)
+                if isinstance(result, dict) and "statusCode" in result:
+                    fields["status_code"] = result["statusCode"]
+        finally:
+            if profiler is not None:
+                _finish_profile(profiler, f"{SERVICE}-{handler.__name__}")
+                _profile_lock.release()
+        return result
+    return wrapper
+
+def _start_profile():
+    """An enabled profiler, or None if profiling is unavailable (never fails the handler)."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except Exception as e:
+        logger.warning("Profiling skipped: %s", e)
+        return None
+    return profiler
+
+def _finish_profile(profiler, name):
+    try:
+        profiler.disable()
+        _dump_profile(profiler, name)
+    except Exception as e:
+        logger.warning("Failed to write the profile of %s: %s", name, e)
+
+_warm = False
+
+def _cold_start():
+    global _warm
+    cold, _warm = not _warm, True
+    return cold
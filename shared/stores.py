@@ -0,0 +1,95 @@
+"""
+Cache tiers shared by the grid detection, clue extraction and solver Lambdas.
+
+Each Lambda is deployed on its own, so this module is linked into every
+package directory and the build scripts in terraform/utils copy it into the
+zips. Edit it here, in shared/.
+
+The persistent stores hold bytes; the caches in front of them decide how
+entries are encoded.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError
+
+class LRUCache:
+    """Bounded, thread-safe in-memory tier."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskStore:
+    """Persistent tier storing one file per key, e.g. under Lambda's /tmp."""
+
+    def __init__(self, directory, suffix=".json"):
+        self.directory = directory
+        self.suffix = suffix
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+class S3Store:
+    """Persistent tier storing one object per key under an S3 prefix."""
+
+    def __init__(self, client, bucket, prefix, suffix=".json", content_type="application/json",
+                 content_encoding=None):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.suffix = suffix
+        self.content_type = content_type
+        self.content_encoding = content_encoding
+
+    def get(self, key):
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}{self.suffix}")
+        except ClientError:
+            # NoSuchKey, or AccessDenied when the role lacks s3:ListBucket: a miss either way
+            return None
+        return obj["Body"].read()
+
+    def put(self, key, data):
+        extra = {"ContentEncoding": self.content_encoding} if self.content_encoding else {}
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}{key}{self.suffix}",
+            Body=data,
+            ContentType=self.content_type,
+            **extra
+        )
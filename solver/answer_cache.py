@@ -0,0 +1,147 @@
+"""
+Clue -> answer memoization for the solver.
+
+Answers are keyed by normalized clue text and answer length, with an
+in-process LRU in front of an optional persistent store (SQLiteStore, or any
+object with get(key) and put(key, answer)).
+
+Pre-warm a database from generated solution files:
+    python answer_cache.py answers.sqlite3 ../dataset/solutions/*_solution.json
+"""
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+from clue_parser import clue_prompt_text, index_clues
+from stores import LRUCache
+
+logger = logging.getLogger(__name__)
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+BLANK_PATTERN = re.compile(r"_+")
+SPACE_PATTERN = re.compile(r"\s+")
+
+def normalize_clue(text):
+    """Lowercase, drop punctuation and collapse blanks/whitespace so trivially different clues share a key."""
+    text = BLANK_PATTERN.sub(" _ ", text.lower())
+    text = PUNCTUATION_PATTERN.sub(" ", text)
+    return SPACE_PATTERN.sub(" ", text).strip()
+
+def answer_key(clue, length):
+    return f"{length}|{normalize_clue(clue)}"
+
+class SQLiteStore:
+    """Persistent tier in a single SQLite file (e.g. under /tmp, or shipped pre-warmed)."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, answer):
+        self.put_many([(key, answer)])
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO answers (key, answer) VALUES (?, ?)", items)
+            self._conn.commit()
+
+class AnswerCache:
+    """
+    Two-tier clue -> answer cache.
+
+    stats counts memory/store hits and misses; the average model latency of
+    misses is tracked (record_solve) so hits can be reported as latency saved.
+    Only put answers the grid fill accepted: a model's first guess is often
+    replaced once the crossings are known.
+    """
+
+    def __init__(self, max_entries=4096, store=None):
+        self.memory = LRUCache(max_entries)
+        self.store = store
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+        self._solve_seconds = 0.0
+        self._solved = 0
+        self._lock = threading.Lock()
+
+    def get(self, clue, length):
+        """Return the cached answer for (clue, length), or None."""
+        key = answer_key(clue, length)
+        answer = self.memory.get(key)
+        if answer is not None:
+            with self._lock:
+                self.stats["memory_hits"] += 1
+            return answer
+        answer = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            self.stats["store_hits" if answer is not None else "misses"] += 1
+        if answer is not None:
+            self.memory.put(key, answer)
+        return answer
+
+    def record_solve(self, seconds):
+        """Record how long the model took to answer a missed clue, for the savings estimate."""
+        with self._lock:
+            self._solve_seconds += seconds
+            self._solved += 1
+
+    def put(self, clue, length, answer):
+        """Cache an accepted answer for (clue, length)."""
+        if len(answer) != length or not answer.isalpha():
+            return
+        key = answer_key(clue, length)
+        unchanged = self.memory.get(key) == answer
+        self.memory.put(key, answer)
+        if self.store is not None and not unchanged:
+            try:
+                self.store.put(key, answer)
+            except Exception as e:
+                # The answer is still valid; only persistence failed
+                logger.warning("Failed to persist answer for %s: %s", key, e)
+
+    @property
+    def average_solve_seconds(self):
+        with self._lock:
+            return self._solve_seconds / self._solved if self._solved else 0.0
+
+def solution_pairs(data):
+    """
+    Yield (clue, length, answer) from a solution JSON written by
+    data-generation/render_crossword.py::save_solution_with_clues. The clue is
+    clue_prompt_text, the same text the solver looks answers up by.
+    """
+    for direction in ("across", "down"):
+        clues = index_clues(data.get("clues", {}).get(direction, []), direction)
+        for number, answer in data.get("solutions", {}).get(direction, {}).items():
+            record = clues.get(int(number))
+            if record and answer:
+                yield clue_prompt_text(record), len(answer), answer.upper()
+
+def warm_from_solutions(store, paths):
+    """Load every clue/answer pair from the given solution files into a store. Returns the count."""
+    items = []
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        items.extend((answer_key(clue, length), answer) for clue, length, answer in solution_pairs(data))
+    if hasattr(store, "put_many"):
+        store.put_many(items)
+    else:
+        for key, answer in items:
+            store.put(key, answer)
+    return len(items)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(2)
+    count = warm_from_solutions(SQLiteStore(sys.argv[1]), sys.argv[2:])
+    print(f"Stored {count} clue/answer pairs in {sys.argv[1]}")
@@ -0,0 +1,240 @@
+"""
+Constraint-propagation grid fill.
+
+Every slot has a ranked list of candidate answers. A slot's domain is an int
+bitset over its candidates (bit k set = candidate k still possible), and for
+every position of every slot a letter -> bitset table gives the candidates
+with that letter there, so checking a crossing is a handful of ANDs/ORs.
+
+The search keeps the grid arc consistent (AC-3), picks the most constrained
+slot first, and tries its best few candidates in rank order. A slot with no
+consistent candidate is left open instead of failing the whole grid; the best
+assignment is the one filling the most slots, ties broken by candidate rank.
+Branching is bounded by limited discrepancy search, so the first complete fill
+comes after a few dozen nodes and the budget only limits how much it improves.
+"""
+from collections import deque
+import numpy as np
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+def _bits(bits):
+    """Yield the indices of set bits, lowest (best ranked) first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+def slot_cells(slot):
+    r, c = slot["row"], slot["col"]
+    if slot["direction"] == "across":
+        return [(r, c + i) for i in range(slot["length"])]
+    return [(r + i, c) for i in range(slot["length"])]
+
+def crossing_counts(slots):
+    """Number of cells each slot shares with another slot."""
+    owners = {}
+    for slot in slots:
+        for cell in slot_cells(slot):
+            owners[cell] = owners.get(cell, 0) + 1
+    return [sum(owners[cell] > 1 for cell in slot_cells(slot)) for slot in slots]
+
+def slot_pattern(letters, slot):
+    """The slot's current letters from a fill_grid letter grid, e.g. "A?P?E"."""
+    return "".join(letters[r, c] for r, c in slot_cells(slot))
+
+def matches_pattern(word, pattern):
+    return len(word) == len(pattern) and all(p == "?" or p == w for w, p in zip(word, pattern))
+
+class GridFill:
+    """
+    Args:
+        slots: Dicts with row, col, direction and length.
+        candidates: One ranked list of candidate answers per slot.
+        max_nodes: Search budget; once spent, the best fill found so far is kept.
+        branching: Candidates tried per slot at each branch point.
+        max_discrepancies: Deviations from the heuristic allowed on one path.
+    """
+
+    def __init__(self, slots, candidates, max_nodes=5000, branching=3, max_discrepancies=8):
+        self.slots = slots
+        self.max_nodes = max_nodes
+        self.branching = branching
+        self.max_discrepancies = max_discrepancies
+        self.nodes = 0
+
+        # Drop duplicates and wrong-length, placeholder or non A-Z answers, keeping rank order
+        self.candidates = []
+        for slot, words in zip(slots, candidates):
+            seen = []
+            for word in words:
+                if len(word) == slot["length"] and word.isascii() and word.isalpha() and word not in seen:
+                    seen.append(word)
+            self.candidates.append(seen)
+
+        # letter_masks[s][i][letter] = candidates of slot s with `letter` at position i
+        self.letter_masks = []
+        for slot, words in zip(slots, self.candidates):
+            masks = [{} for _ in range(slot["length"])]
+            for k, word in enumerate(words):
+                for i, letter in enumerate(word):
+                    masks[i][letter] = masks[i].get(letter, 0) | (1 << k)
+            self.letter_masks.append(masks)
+
+        # neighbors[s] = [(t, i, j)]: position i of slot s is position j of slot t
+        owners = {}
+        for s, slot in enumerate(slots):
+            for i, cell in enumerate(slot_cells(slot)):
+                owners.setdefault(cell, []).append((s, i))
+        self.neighbors = [[] for _ in slots]
+        for cell_owners in owners.values():
+            for s, i in cell_owners:
+                for t, j in cell_owners:
+                    if s != t:
+                        self.neighbors[s].append((t, i, j))
+
+        self.best = None
+        self.best_score = None
+        self._seen = {}
+
+    def _supported(self, s, i, t, j, domains):
+        """Candidates of s whose letter at i appears at j in some remaining candidate of t."""
+        allowed = 0
+        s_masks = self.letter_masks[s][i]
+        for letter, mask in self.letter_masks[t][j].items():
+            if mask & domains[t]:
+                allowed |= s_masks.get(letter, 0)
+        return allowed
+
+    def propagate(self, domains, active):
+        """
+        Make the active slots arc consistent, in place.
+
+        Returns:
+            (emptied slot, crossing slot that emptied it), or None if consistent.
+        """
+        queue = deque((s, t, i, j) for s in active for t, i, j in self.neighbors[s] if t in active)
+        queued = set(queue)
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            s, t, i, j = arc
+            reduced = domains[s] & self._supported(s, i, t, j, domains)
+            if reduced == domains[s]:
+                continue
+            domains[s] = reduced
+            if not reduced:
+                return s, t
+            for u, k, m in self.neighbors[s]:
+                back = (u, s, m, k)
+                if u != t and u in active and back not in queued:
+                    queue.append(back)
+                    queued.add(back)
+        return None
+
+    def _score(self, domains, active):
+        filled = len(active)
+        rank = sum((domains[s] & -domains[s]).bit_length() - 1 for s in active)
+        return filled, -rank
+
+    def _out_of_nodes(self):
+        return self.nodes >= self.max_nodes and self.best is not None
+
+    def _search(self, domains, active, discrepancies):
+        # Bound: even filling every remaining active slot cannot beat the best
+        if self.best_score is not None and len(active) < self.best_score[0]:
+            return
+        # A state already searched with at least this many discrepancies left has nothing new
+        state = (tuple(domains), frozenset(active))
+        if self._seen.get(state, -1) >= discrepancies:
+            return
+        self._seen[state] = discrepancies
+        self.nodes += 1
+
+        trial = list(domains)
+        conflict = self.propagate(trial, active)
+        if conflict is not None:
+            # Two crossing slots cannot both be filled: leave one of them open and
+            # start again from the unpruned domains. Leaving the emptied slot open
+            # is the heuristic choice; the crossing slot costs a discrepancy
+            for cost, dropped in enumerate(conflict):
+                if cost > discrepancies or self._out_of_nodes():
+                    return
+                self._search(domains, active - {dropped}, discrepancies - cost)
+            return
+        domains = trial
+
+        undecided = [s for s in active if domains[s] & (domains[s] - 1)]
+        if not undecided:
+            score = self._score(domains, active)
+            if self.best_score is None or score > self.best_score:
+                self.best, self.best_score = (list(domains), set(active)), score
+            return
+
+        # Most constrained first; more crossings breaks ties. Only the top
+        # `branching` candidates are tried, the k-th best costing k discrepancies
+        s = min(undecided, key=lambda x: (_popcount(domains[x]), -len(self.neighbors[x])))
+        for cost, k in enumerate(_bits(domains[s])):
+            if cost >= self.branching or cost > discrepancies or self._out_of_nodes():
+                return
+            trial = list(domains)
+            trial[s] = 1 << k
+            self._search(trial, active, discrepancies - cost)
+
+    def solve(self):
+        """
+        Limited discrepancy search: the first pass follows the heuristic all the
+        way down (best-ranked candidate, leave the emptied slot open), so there
+        is always a complete fill; each further pass allows one more deviation,
+        until max_discrepancies or the node budget is reached.
+
+        Returns:
+            list: The chosen answer per slot, or None for slots left open.
+        """
+        domains = [(1 << len(words)) - 1 for words in self.candidates]
+        active = {s for s, bits in enumerate(domains) if bits}
+        for discrepancies in range(self.max_discrepancies + 1):
+            self._search(domains, active, discrepancies)
+            # Out of budget, or every slot with a candidate is filled
+            if self.nodes >= self.max_nodes or self.best_score[0] == len(active):
+                break
+        domains, active = self.best
+        return [
+            self.candidates[s][(domains[s] & -domains[s]).bit_length() - 1] if s in active else None
+            for s in range(len(self.slots))
+        ]
+
+def fill_grid(grid_matrix, slots, candidates, max_nodes=5000):
+    """
+    Choose one answer per slot so crossings agree, and write them into a letter grid.
+
+    Args:
+        grid_matrix: 1 for white cells, 0 for black.
+        slots: Dicts with row, col, direction and length.
+        candidates: One ranked list of candidate answers per slot.
+
+    Returns:
+        tuple: (letters, answers, stats). letters is a NumPy array of single
+        characters ("" for black cells, "?" for white cells left open),
+        answers the chosen word (or None) per slot.
+    """
+    white = np.asarray(grid_matrix, dtype=bool)
+    letters = np.where(white, "?", "").astype("<U1")
+
+    fill = GridFill(slots, candidates, max_nodes=max_nodes)
+    answers = fill.solve()
+    for slot, answer in zip(slots, answers):
+        if answer is None:
+            continue
+        cells = slot_cells(slot)
+        rows, cols = zip(*cells)
+        letters[list(rows), list(cols)] = list(answer)
+
+    stats = {
+        "slots": len(slots),
+        "filled_slots": sum(answer is not None for answer in answers),
+        "open_cells": int(np.count_nonzero(letters == "?")),
+        "search_nodes": fill.nodes
+    }
+    return letters, answers, stats
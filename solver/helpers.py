@@ -1,5 +1,129 @@
+import json
+import re
+import threading
 
+class UsageStats:
+    """
+    Thread-safe count of Bedrock calls and tokens for one puzzle, in total and
+    per model tier.
+
+    Args:
+        prices: Optional {model_id: (input, output)} USD per 1K tokens, used to
+            report the cost of each tier.
+    """
+
+    def __init__(self, prices=None):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.saved_seconds = 0.0
+        self.prices = prices or {}
+        self.tiers = {}
+        self._lock = threading.Lock()
+
+    def _tier(self, model):
+        # Caller holds the lock; dicts keep the order tiers were first used
+        if model not in self.tiers:
+            self.tiers[model] = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0,
+                                 "answered": 0, "escalated": {}}
+        return self.tiers[model]
+
+    def record(self, resp_json, model=None, seconds=0.0):
+        usage = resp_json.get("usage") or {}
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.output_tokens += usage.get("output_tokens", 0)
+            if model is not None:
+                tier = self._tier(model)
+                tier["calls"] += 1
+                tier["input_tokens"] += usage.get("input_tokens", 0)
+                tier["output_tokens"] += usage.get("output_tokens", 0)
+                tier["seconds"] += seconds
+
+    def record_cache(self, hits, misses, saved_seconds):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+            self.saved_seconds += saved_seconds
+
+    def record_answer(self, model, count=1):
+        """Count clues whose answers were accepted from this tier."""
+        with self._lock:
+            self._tier(model)["answered"] += count
 
+    def record_escalation(self, model, reason, count=1):
+        """Count clues passed on from this tier to the next, by reason."""
+        with self._lock:
+            escalated = self._tier(model)["escalated"]
+            escalated[reason] = escalated.get(reason, 0) + count
+
+    def as_dict(self):
+        lookups = self.cache_hits + self.cache_misses
+        tiers = []
+        with self._lock:
+            for model, tier in self.tiers.items():
+                input_price, output_price = self.prices.get(model, (0.0, 0.0))
+                tiers.append({
+                    "model": model,
+                    "calls": tier["calls"],
+                    "answered": tier["answered"],
+                    "escalated": dict(tier["escalated"]),
+                    "input_tokens": tier["input_tokens"],
+                    "output_tokens": tier["output_tokens"],
+                    "avg_latency_ms": round(1000 * tier["seconds"] / tier["calls"], 1) if tier["calls"] else 0.0,
+                    "cost_usd": round((tier["input_tokens"] * input_price
+                                       + tier["output_tokens"] * output_price) / 1000, 6)
+                })
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "cache_saved_seconds": round(self.saved_seconds, 3),
+            "tiers": tiers,
+            "cost_usd": round(sum(tier["cost_usd"] for tier in tiers), 6)
+        }
+
+NON_LETTER_PATTERN = re.compile(r"[^A-Z]")
+
+def _normalize_answer(text):
+    """Uppercase and keep the letters A-Z only (accented and non-Latin letters are dropped)."""
+    return NON_LETTER_PATTERN.sub("", (text or "").upper())
+
+JSON_ARRAY_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+
+def _parse_batch_answers(text, count):
+    """
+    Parse a batched reply into {item_id: [answers, best first]} (ids are 1-based).
+    Accepts [{"id": 1, "answers": ["WORD", ...]}, ...], {"id": 1, "answer": "WORD"}
+    items or a plain ["WORD", ...] list; items that are missing or malformed are
+    simply absent from the result.
+    """
+    match = JSON_ARRAY_PATTERN.search(text or "")
+    if not match:
+        return {}
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+    answers = {}
+    for position, item in enumerate(items, 1):
+        if isinstance(item, dict):
+            item_id = item.get("id", position)
+            words = item.get("answers", item.get("answer"))
+        else:
+            item_id, words = position, item
+        if isinstance(words, str):
+            words = [words]
+        if isinstance(item_id, int) and 1 <= item_id <= count and isinstance(words, list):
+            answers.setdefault(item_id, [_normalize_answer(w) for w in words if isinstance(w, str)])
+    return answers
 
 def _extract_text_from_response(resp_json):
     """
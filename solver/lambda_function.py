@@ -1,98 +1,156 @@
 import os
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 import boto3
+from botocore.config import Config
 import json
-from helpers import _extract_text_from_response
+from answer_cache import AnswerCache, SQLiteStore
+from clue_parser import clue_prompt_text, index_clues
+from fill import crossing_counts, fill_grid, matches_pattern, slot_pattern
+from helpers import UsageStats, _extract_text_from_response, _normalize_answer, _parse_batch_answers
+from instrumentation import emit_metric, instrumented_handler, span
+from rate_limit import TokenBucket, backoff
+from word_index import WordIndex
 
 model_id = os.environ.get("BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
 
-bedrock = boto3.client("bedrock-runtime")
+# Model cascade, cheapest first: a clue only goes to the next model when the
+# answer is invalid or fails the second-pass check. A single model disables it
+model_tiers = list(dict.fromkeys(
+    m.strip() for m in os.environ.get(
+        "SOLVER_MODEL_TIERS", f"anthropic.claude-3-haiku-20240307-v1:0,{model_id}"
+    ).split(",") if m.strip()
+))
+
+# Attempts on every tier but the last before escalating
+cascade_retries = int(os.environ.get("SOLVER_CASCADE_RETRIES", "1"))
+
+# Answers longer than this skip straight to the last tier; 0 means no limit
+cascade_max_length = int(os.environ.get("SOLVER_CASCADE_MAX_LENGTH", "0"))
+
+# Second-pass check on lower-tier answers: "index" escalates a best answer that
+# is not in SOLVER_WORD_INDEX (no-op without an index), "none" accepts any valid one
+cascade_check = os.environ.get("SOLVER_CASCADE_CHECK", "index")
+
+# Tier (0 = first model) that re-queries slots the fill left open because of
+# crossing conflicts
+requery_tier = int(os.environ.get("SOLVER_REQUERY_TIER", "1"))
+
+# USD per 1K input/output tokens for the per-tier cost report; SOLVER_MODEL_PRICES
+# (JSON {"model_id": [input, output]}) adds or overrides entries
+model_prices = {
+    "anthropic.claude-3-haiku-20240307-v1:0": (0.00025, 0.00125),
+    "anthropic.claude-3-5-haiku-20241022-v1:0": (0.0008, 0.004),
+    "anthropic.claude-3-sonnet-20240229-v1:0": (0.003, 0.015),
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": (0.003, 0.015),
+    **{model: tuple(price) for model, price in json.loads(os.environ.get("SOLVER_MODEL_PRICES", "{}")).items()}
+}
+
+# Clues solved in parallel; Bedrock calls are I/O bound so threads are enough
+solver_concurrency = int(os.environ.get("SOLVER_CONCURRENCY", "8"))
+
+# Clues per InvokeModel call; 1 sends each clue on its own
+solver_batch_size = int(os.environ.get("SOLVER_BATCH_SIZE", "1"))
+
+# Ranked answers requested per clue (in the same call) for the grid fill to choose from
+solver_candidates = int(os.environ.get("SOLVER_CANDIDATES", "3"))
+
+# Re-query waves for slots the fill left open, using their known crossing letters; 0 disables
+solver_requery_waves = int(os.environ.get("SOLVER_REQUERY_WAVES", "3"))
+
+# Open slots whose pattern matches at most this many indexed words get them as
+# candidates before any model re-query (SOLVER_WORD_INDEX points at the index file)
+index_max_matches = int(os.environ.get("SOLVER_INDEX_MAX_MATCHES", "20"))
+
+# Stop scheduling model calls this long before the Lambda timeout, to leave
+# time to fill the grid and return it
+deadline_margin_ms = int(os.environ.get("SOLVER_DEADLINE_MARGIN_MS", "3000"))
+
+# Client-side limit on InvokeModel calls per second (burst up to SOLVER_BURST),
+# so a large puzzle stays under the account quota instead of being throttled
+bedrock_rate_limit = TokenBucket(
+    float(os.environ.get("SOLVER_RATE_PER_SEC", "10")),
+    float(os.environ.get("SOLVER_BURST", str(solver_concurrency)))
+)
+
+# Client is created on first use so a cold start only pays for the imports
+_bedrock = None
+_client_lock = threading.Lock()
+
+def get_bedrock_client():
+    global _bedrock
+    with _client_lock:
+        if _bedrock is None:
+            _bedrock = boto3.client("bedrock-runtime", config=Config(
+                # One pooled connection per worker so concurrent calls don't queue
+                max_pool_connections=max(10, solver_concurrency),
+                tcp_keepalive=True,
+                connect_timeout=5,
+                read_timeout=30,
+                # solve_with_claude has its own retry loop
+                retries={"max_attempts": 2, "mode": "standard"}
+            ))
+    return _bedrock
+
+_answer_cache = None
+
+def get_answer_cache():
+    """
+    Clue -> answer cache. The in-memory tier survives warm invocations;
+    SOLVER_CACHE_DB points at a SQLite file (e.g. /tmp/answers.sqlite3, or a
+    database pre-warmed with answer_cache.py) for a persistent tier.
+    """
+    global _answer_cache
+    with _client_lock:
+        if _answer_cache is None:
+            store = SQLiteStore(os.environ["SOLVER_CACHE_DB"]) if os.environ.get("SOLVER_CACHE_DB") else None
+            _answer_cache = AnswerCache(int(os.environ.get("SOLVER_CACHE_SIZE", "4096")), store)
+    return _answer_cache
+
+_word_index = None
+
+def get_word_index():
+    """The memory-mapped word index from SOLVER_WORD_INDEX (built with word_index.py), or None."""
+    global _word_index
+    with _client_lock:
+        if _word_index is None and os.environ.get("SOLVER_WORD_INDEX"):
+            _word_index = WordIndex(os.environ["SOLVER_WORD_INDEX"])
+    return _word_index
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)  # Change to INFO in production
 
 
+@instrumented_handler
 def lambda_handler(event, context):
     """
     AWS Lambda to solve a crossword puzzle using Amazon Q for clue solving.
-    """
 
-    logger.info("Received event: %s", json.dumps(event))
+    The response is returned once the solve is done. For progress as it
+    happens, iterate solve_puzzle_events in process, run this file locally
+    (NDJSON on stdout) or submit a "solver" job through pipeline/jobs.py.
 
+    Model calls stop SOLVER_DEADLINE_MARGIN_MS before the invocation times out;
+    the best grid so far is returned and the unsolved slots are listed in
+    stats["skipped_slots"].
+    """
     try:
-        # Parse the crossword inputs
-        clues = event.get("clues", {})
-        if isinstance(clues, str):
-            clues = json.loads(clues)
-
-        grid_data = event.get("grid_data", {})
-        if isinstance(grid_data, str):
-            grid_data = json.loads(grid_data)
-
-        across_clues = clues.get("across", [])
-        down_clues = clues.get("down", [])
-
-        logger.info("Parsed %d across clues and %d down clues", len(across_clues), len(down_clues))
-
-        grid_matrix = grid_data.get("grid_matrix", [])
-        across_positions = grid_data.get("across_clues", [])
-        down_positions = grid_data.get("down_clues", [])
-
-        logger.info("Grid matrix size: %dx%d", len(grid_matrix), len(grid_matrix[0]) if grid_matrix else 0)
-        logger.info("Across positions: %s", across_positions)
-        logger.info("Down positions: %s", down_positions)
-
-        # ---- Sanity checks ----
-        if len(across_clues) != len(across_positions):
-            raise ValueError(
-                f"Across clues mismatch: {len(across_clues)} clues vs {len(across_positions)} positions"
-            )
-        if len(down_clues) != len(down_positions):
-            raise ValueError(
-                f"Down clues mismatch: {len(down_clues)} clues vs {len(down_positions)} positions"
-            )
-
-        # Prepare empty solution grid
-        solution_grid = [["" for _ in row] for row in grid_matrix]
-        logger.info("Initialized empty solution grid")
-
-        # ---- Across clues ----
-        for clue_num, r, c in across_positions:
-            clue_text = next((cl for cl in across_clues if cl.startswith(f"{clue_num}.")), None)
-            if clue_text:
-                logger.info("Solving across clue %s at (%d,%d): %s", clue_num, r, c, clue_text)
-
-                length = count_across_length(grid_matrix, r, c)
-                answer = solve_with_claude(clue_text, length)
-
-                if is_consistent_with_grid(solution_grid, r, c, "across", answer):
-                    for i, letter in enumerate(answer):
-                        solution_grid[r][c + i] = letter
-                else:
-                    logger.warning("Inconsistent across answer for %s: %s", clue_num, answer)
-
-        # ---- Down clues ----
-        for clue_num, r, c in down_positions:
-            clue_text = next((cl for cl in down_clues if cl.startswith(f"{clue_num}.")), None)
-            if clue_text:
-                logger.info("Solving down clue %s at (%d,%d): %s", clue_num, r, c, clue_text)
-
-                length = count_down_length(grid_matrix, r, c)
-                answer = solve_with_claude(clue_text, length)
-
-                if is_consistent_with_grid(solution_grid, r, c, "down", answer):
-                    for i, letter in enumerate(answer):
-                        solution_grid[r + i][c] = letter
-                else:
-                    logger.warning("Inconsistent down answer for %s: %s", clue_num, answer)
-
+        deadline = None
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            deadline = time.monotonic() + (context.get_remaining_time_in_millis() - deadline_margin_ms) / 1000
+        for final in solve_puzzle_events(event, deadline=deadline):
+            pass
         logger.info("Crossword solution grid constructed successfully")
 
         return {
             "statusCode": 200,
             "body": json.dumps({
-                "solution_grid": solution_grid
+                "solution_grid": final["solution_grid"],
+                "stats": final["stats"]
             })
         }
 
@@ -103,58 +161,589 @@ def lambda_handler(event, context):
             "body": json.dumps({"error": str(e)})
         }
 
-def solve_with_claude(clue: str, length: int, retries: int = 3) -> str:
+def parse_puzzle(event):
+    """
+    Read the grid and clues from a solver event.
+
+    Returns:
+        tuple: (grid_matrix, slots), slots being dicts with direction, number,
+        row, col, length and clue (across first, then down).
     """
-    Use Claude Sonnet 3 via Bedrock InvokeModel (body JSON).
+    # Parse the crossword inputs
+    clues = event.get("clues", {})
+    if isinstance(clues, str):
+        clues = json.loads(clues)
+
+    grid_data = event.get("grid_data", {})
+    if isinstance(grid_data, str):
+        grid_data = json.loads(grid_data)
+
+    # Parsed records from clue extraction, or raw "12. Clue" strings from older callers
+    across_clues = clues.get("across", [])
+    down_clues = clues.get("down", [])
+    across_index = index_clues(across_clues, "across")
+    down_index = index_clues(down_clues, "down")
+
+    logger.info("Parsed %d across clues and %d down clues", len(across_clues), len(down_clues))
+
+    grid_matrix = grid_data.get("grid_matrix", [])
+    across_positions = grid_data.get("across_clues", [])
+    down_positions = grid_data.get("down_clues", [])
+
+    # Slot table from grid detection; older callers only send the matrix
+    slot_lengths = {
+        (slot["direction"], slot["number"]): slot["length"] for slot in grid_data.get("slots") or []
+    }
+
+    logger.info("Grid matrix size: %dx%d", len(grid_matrix), len(grid_matrix[0]) if grid_matrix else 0)
+
+    # ---- Sanity checks ----
+    if len(across_clues) != len(across_positions):
+        raise ValueError(
+            f"Across clues mismatch: {len(across_clues)} clues vs {len(across_positions)} positions"
+        )
+    if len(down_clues) != len(down_positions):
+        raise ValueError(
+            f"Down clues mismatch: {len(down_clues)} clues vs {len(down_positions)} positions"
+        )
+
+    # Collect every slot that has a clue, across first then down
+    slots = []
+    for direction, positions, index in (("across", across_positions, across_index),
+                                        ("down", down_positions, down_index)):
+        for clue_num, r, c in positions:
+            clue = index.get(clue_num)
+            if not clue:
+                continue
+            if direction == "across":
+                length = slot_lengths.get((direction, clue_num)) or count_across_length(grid_matrix, r, c)
+            else:
+                length = slot_lengths.get((direction, clue_num)) or count_down_length(grid_matrix, r, c)
+            slots.append({"direction": direction, "number": clue_num, "row": r, "col": c,
+                          "length": length, "clue": clue_prompt_text(clue)})
+    return grid_matrix, slots
+
+def _slot_event(stage, slot, words):
+    return {
+        "event": "slot",
+        "stage": stage,
+        "direction": slot["direction"],
+        "number": slot["number"],
+        "answers": words,
+        "status": "solved" if words else "rejected"
+    }
+
+def _grid_event(stage, fill_result):
+    letters, _, stats = fill_result
+    return {"event": "grid", "stage": stage, "solution_grid": letters.tolist(),
+            "filled_slots": stats["filled_slots"]}
+
+def solve_puzzle_events(event, deadline=None):
     """
-    system_prompt = (
-        "You are a crossword puzzle solver. **Respond ONLY with a single English word**, "
-        "no punctuation, no explanation, no surrounding text. Return the word in UPPERCASE only."
+    Solve a puzzle, yielding JSON-serialisable progress events as they happen:
+
+        {"event": "slot", "stage": "solve"|"requery", "direction", "number", "answers", "status"}
+            as each clue's answers arrive ("rejected" when none were valid)
+        {"event": "grid", "stage": "fill"|"index"|"requery", "solution_grid", "filled_slots"}
+            whenever the grid is (re)filled
+        {"event": "done", "solution_grid", "stats"}
+            last, with the complete grid
+
+    This is the streaming interface (the Lambda response cannot stream);
+    lambda_handler drains it.
+
+    Args:
+        deadline: Optional time.monotonic() value after which no more model
+            calls are made or waited for.
+    """
+    with span("parse") as fields:
+        grid_matrix, slots = parse_puzzle(event)
+        fields["slots"] = len(slots)
+    batch_size = int(event.get("batch_size", solver_batch_size))
+    count = int(event.get("candidates", solver_candidates))
+
+    usage = UsageStats(model_prices)
+    candidates = [[] for _ in slots]
+    answered = set()
+    # Generator stages are timed by hand: a span would be left open across yields
+    start = time.perf_counter()
+    for i, words in iter_solve_clues(slots, batch_size=batch_size, usage=usage,
+                                     use_cache=event.get("use_cache", True), candidates=count,
+                                     deadline=deadline):
+        candidates[i] = words
+        answered.add(i)
+        yield _slot_event("solve", slots[i], words)
+    emit_metric("solve", round((time.perf_counter() - start) * 1000, 3), slots=len(slots))
+    skipped = [{"direction": slot["direction"], "number": slot["number"]}
+               for i, slot in enumerate(slots) if i not in answered]
+
+    # Pick one candidate per slot so that every crossing agrees, then ask
+    # again for the open slots now that their crossings are known
+    with span("fill") as fields:
+        fill_result = fill_grid(grid_matrix, slots, candidates)
+        fields.update(fill_result[2])
+    yield _grid_event("fill", fill_result)
+    start = time.perf_counter()
+    letters, answers, fill_stats = yield from iter_requery_open_slots(
+        grid_matrix, slots, candidates, fill_result, usage=usage, batch_size=batch_size, count=count,
+        max_waves=int(event.get("requery_waves", solver_requery_waves)), deadline=deadline
     )
-    user_text = f"Crossword clue: {clue}\nProvide a single valid English word EXACTLY {length} letters long."
+    emit_metric("requery", round((time.perf_counter() - start) * 1000, 3),
+                requeried_slots=fill_stats["requeried_slots"], waves=fill_stats["requery_waves"])
+    if event.get("use_cache", True):
+        cache_answers(slots, answers)
+
+    stats = {**usage.as_dict(), **fill_stats, "skipped_slots": skipped,
+             "deadline_reached": deadline is not None and time.monotonic() >= deadline}
+    yield {"event": "done", "solution_grid": letters.tolist(), "stats": stats}
+
+def solve_clues(slots, max_workers=None, batch_size=1, usage=None, use_cache=True, candidates=1, deadline=None):
+    """
+    Solve every slot's clue; see iter_solve_clues.
+
+    Returns:
+        list: One list of candidate answers (best first, possibly empty) per slot,
+        in the same order as slots.
+    """
+    results = [[] for _ in slots]
+    for i, words in iter_solve_clues(slots, max_workers, batch_size, usage, use_cache, candidates, deadline):
+        results[i] = words
+    return results
+
+def iter_solve_clues(slots, max_workers=None, batch_size=1, usage=None, use_cache=True, candidates=1,
+                     deadline=None):
+    """
+    Solve every slot's clue, answering from the clue cache where possible and
+    sending the rest to Bedrock concurrently on a bounded thread pool.
+
+    Args:
+        slots: Dicts with at least "clue" and "length".
+        max_workers: Concurrent Bedrock calls (default SOLVER_CONCURRENCY).
+        batch_size: Clues sent per call; above 1 uses solve_batch_with_claude.
+        usage: Optional UsageStats collecting calls, tokens and cache hits.
+        use_cache: Look up answers in get_answer_cache(). Nothing is stored;
+            see cache_answers.
+        candidates: Answers requested per clue.
+        deadline: Optional time.monotonic() value; slots not answered by then
+            are never yielded.
+
+    Yields:
+        tuple: (slot index, candidate answers best first, possibly empty) in
+        completion order; cache hits come first, then model calls are started
+        with the slots that cross the most others first.
+    """
+    cache = get_answer_cache() if use_cache else None
+    todo = []
+    for i, slot in enumerate(slots):
+        cached = cache.get(slot["clue"], slot["length"]) if cache else None
+        if cached:
+            yield i, [cached]
+        else:
+            todo.append(i)
+    if cache is not None and usage is not None:
+        hits = len(slots) - len(todo)
+        usage.record_cache(hits, len(todo), hits * cache.average_solve_seconds)
+    if not todo:
+        return
+
+    # A slot with many crossings constrains the most of the grid
+    crossings = crossing_counts(slots)
+    todo.sort(key=lambda i: -crossings[i])
+    solved = _iter_uncached([slots[i] for i in todo], max_workers or solver_concurrency, batch_size,
+                            candidates, usage, deadline)
+    for j, words, seconds in solved:
+        if cache is not None and words:
+            cache.record_solve(seconds)
+        yield todo[j], words
+
+def cache_answers(slots, answers):
+    """Store the answers the final grid fill placed (None = open slot) in get_answer_cache()."""
+    cache = get_answer_cache()
+    for slot, answer in zip(slots, answers):
+        if answer is not None:
+            cache.put(slot["clue"], slot["length"], answer)
+
+def _iter_uncached(slots, max_workers, batch_size, candidates, usage, deadline=None, start_tier=0):
+    """
+    Yields (slot index, candidate answers, seconds spent on them) in completion order.
+    Every clue goes through the model cascade from start_tier. Work still queued
+    or running at the deadline is cancelled and never yielded.
+    """
+    def timed_batch(batch):
+        start = time.perf_counter()
+        results = cascade_batch([slots[i] for i in batch], usage=usage, candidates=candidates,
+                                deadline=deadline, start_tier=start_tier)
+        seconds = (time.perf_counter() - start) / len(batch)
+        return [(i, words, seconds) for i, words in zip(batch, results)]
+
+    def timed_single(i):
+        start = time.perf_counter()
+        words = cascade_candidates(slots[i]["clue"], slots[i]["length"], candidates, usage=usage,
+                                   pattern=slots[i].get("pattern"), deadline=deadline, start_tier=start_tier)
+        return [(i, words, time.perf_counter() - start)]
+
+    if batch_size > 1:
+        task = timed_batch
+        work = [range(i, min(i + batch_size, len(slots))) for i in range(0, len(slots), batch_size)]
+    else:
+        task, work = timed_single, range(len(slots))
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(work)))
+    futures = [pool.submit(task, item) for item in work]
+    try:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        for future in as_completed(futures, timeout=timeout):
+            yield from future.result()
+    except FuturesTimeout:
+        logger.warning("Deadline reached with %d of %d calls unfinished",
+                       sum(not f.done() for f in futures), len(futures))
+    finally:
+        # Don't wait for calls still in flight; their results are dropped
+        pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+def iter_requery_open_slots(grid_matrix, slots, candidates, fill_result, usage=None, batch_size=1, count=1,
+                            max_waves=3, deadline=None):
+    """
+    Ask again for the slots the fill left open, giving the model the letters
+    their crossings now fix (e.g. "A?P?E"). A slot left open conflicts with its
+    crossings, so these calls start at SOLVER_REQUERY_TIER of the cascade.
+
+    When a word index is configured, open slots whose pattern has only a few
+    matching words get those words as candidates first, and the model is only
+    asked if that does not fill any more slots. Open slots with the most known
+    letters go first, one wave of up to SOLVER_CONCURRENCY * batch_size slots
+    at a time; the grid is refilled after each wave so later waves see the new
+    letters. A slot is never asked twice with the same pattern, and the loop
+    stops as soon as a wave fills no extra slots or the deadline passes.
+
+    Args:
+        candidates: Per-slot candidate lists; new answers are ranked first.
+        fill_result: (letters, answers, stats) from fill_grid.
+
+    Yields:
+        dict: "slot" and "grid" progress events (see solve_puzzle_events).
+
+    Returns:
+        tuple: The best (letters, answers, stats), with requeried_slots,
+        requery_waves and index_filled_slots added to stats.
+    """
+    letters, answers, stats = fill_result
+    candidates = [list(words) for words in candidates]
+    index = get_word_index()
+    asked, indexed = set(), set()
+    requeried = waves = index_filled = 0
+
+    while waves < max_waves and (deadline is None or time.monotonic() < deadline):
+        open_slots = []
+        for s, (slot, answer) in enumerate(zip(slots, answers)):
+            if answer is not None:
+                continue
+            pattern = slot_pattern(letters, slot)
+            known = len(pattern) - pattern.count("?")
+            # Without any known letter the prompt would be the same as the first pass
+            if known and (s, pattern) not in asked:
+                open_slots.append((known, s, pattern))
+        if not open_slots:
+            break
+
+        open_slots.sort(key=lambda item: (-item[0], item[1]))
+
+        if index is not None:
+            added = False
+            for _, s, pattern in open_slots:
+                if (s, pattern) in indexed:
+                    continue
+                indexed.add((s, pattern))
+                words = _index_match(index, pattern, index_max_matches + 1)
+                if 0 < len(words) <= index_max_matches:
+                    candidates[s] += [w for w in words if w not in candidates[s]]
+                    added = True
+            if added:
+                refill = fill_grid(grid_matrix, slots, candidates)
+                if refill[2]["filled_slots"] > stats["filled_slots"]:
+                    index_filled += refill[2]["filled_slots"] - stats["filled_slots"]
+                    letters, answers, stats = refill
+                    yield _grid_event("index", refill)
+                    # New letters may give other open slots a usable pattern
+                    continue
+
+        wave = open_slots[:solver_concurrency * max(1, batch_size)]
+        asked.update((s, pattern) for _, s, pattern in wave)
+        queries = [{**slots[s], "pattern": pattern} for _, s, pattern in wave]
+        for j, words, _ in _iter_uncached(queries, solver_concurrency, batch_size, count, usage, deadline,
+                                          start_tier=requery_tier):
+            s = wave[j][1]
+            candidates[s] = [w for w in words if w not in candidates[s]] + candidates[s]
+            yield _slot_event("requery", slots[s], words)
+        requeried += len(wave)
+        waves += 1
+
+        refill = fill_grid(grid_matrix, slots, candidates)
+        if refill[2]["filled_slots"] <= stats["filled_slots"]:
+            break
+        letters, answers, stats = refill
+        yield _grid_event("requery", refill)
+
+    return letters, answers, {**stats, "requeried_slots": requeried, "requery_waves": waves,
+                              "index_filled_slots": index_filled}
+
+def invoke_claude(system_prompt, user_text, max_tokens, usage=None, model=None):
+    """
+    Send one InvokeModel request (rate limited) to `model` (default BEDROCK_MODEL_ID)
+    and return the parsed response JSON.
+    """
+    model = model or model_id
+    body_obj = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "system": system_prompt,
+        "messages": [
+            {"role": "user", "content": user_text}
+        ],
+    }
+    body_str = json.dumps(body_obj)
+
+    # Pass body string and modelId (do NOT separately pass messages/max_tokens)
+    with span("rate_limit_wait"):
+        bedrock_rate_limit.acquire()
+    with span("model_call", model=model) as fields:
+        start = time.perf_counter()
+        response = get_bedrock_client().invoke_model(body=body_str, modelId=model)
+
+        raw_body = response.get("body")
+        if hasattr(raw_body, "read"):
+            resp_text = raw_body.read().decode("utf-8")
+            resp_json = json.loads(resp_text)
+        elif isinstance(raw_body, str):
+            resp_json = json.loads(raw_body)
+        else:
+            # sometimes SDK returns full parsed dict
+            resp_json = response
+        fields.update(resp_json.get("usage") or {})
+
+    if usage is not None:
+        usage.record(resp_json, model, time.perf_counter() - start)
+    return resp_json
+
+def solve_with_claude(clue: str, length: int, retries: int = 3, usage=None) -> str:
+    """
+    Solve one clue through the model cascade (SOLVER_MODEL_TIERS), e.g. Claude 3
+    Haiku first and Claude 3 Sonnet only when Haiku's answer does not hold up.
+    """
+    words = cascade_candidates(clue, length, 1, usage=usage, last_retries=retries)
+    return words[0] if words else "?" * length
+
+def _index_match(index, pattern, limit):
+    """WordIndex.match that never fails the solve; a lookup error counts as no match."""
+    try:
+        return index.match(pattern, limit=limit)
+    except Exception as e:
+        logger.warning("Word index lookup failed for %r: %s", pattern, e)
+        return []
+
+def _escalation_reason(words):
+    """Why a lower tier's (already length-checked) answers should go up a tier, or None."""
+    if not words:
+        return "invalid"
+    if cascade_check == "index":
+        index = get_word_index()
+        if index is not None and not _index_match(index, words[0], 1):
+            return "check"
+    return None
+
+def _cascade_tiers(length, start_tier):
+    first = max(0, min(start_tier, len(model_tiers) - 1))
+    if cascade_max_length and length > cascade_max_length:
+        first = len(model_tiers) - 1
+    return range(first, len(model_tiers))
+
+def _merge(words, fallback, count):
+    """A higher tier's answers first, then the lower tier's as a fallback."""
+    return (words + [w for w in fallback if w not in words])[:count]
+
+def cascade_candidates(clue, length, count=1, usage=None, pattern=None, deadline=None, start_tier=0,
+                       last_retries=3):
+    """
+    candidates_with_claude through the model cascade. Lower tiers get
+    SOLVER_CASCADE_RETRIES attempts; their answers are passed on to the next
+    tier when none is valid or the best fails the second-pass check, and are
+    kept behind the higher tier's answers as a fallback.
+
+    Returns:
+        list: Valid answers, best first (empty if every tier failed).
+    """
+    tiers = _cascade_tiers(length, start_tier)
+    words = []
+    for tier in tiers:
+        model = model_tiers[tier]
+        last = tier == tiers[-1]
+        found = candidates_with_claude(clue, length, count, last_retries if last else cascade_retries,
+                                       usage=usage, pattern=pattern, deadline=deadline, model=model)
+        words = _merge(found, words, count)
+        reason = None if last else _escalation_reason(found)
+        if reason is None or (deadline is not None and time.monotonic() >= deadline):
+            if usage is not None and found:
+                usage.record_answer(model)
+            return words
+        if usage is not None:
+            usage.record_escalation(model, reason)
+    return words
+
+def candidates_with_claude(clue: str, length: int, count: int = 1, retries: int = 3, usage=None,
+                           pattern=None, deadline=None, model=None) -> list:
+    """
+    Ask for up to `count` different answers of exactly `length` letters in one call.
+    With a pattern such as "A?P?E" the known letters are part of the prompt and
+    answers that do not match it are rejected. Retries back off exponentially
+    with jitter and stop early rather than run past `deadline`.
+
+    Returns:
+        list: Valid answers, best first (empty if every attempt failed).
+    """
+    if count > 1:
+        system_prompt = (
+            f"You are a crossword puzzle solver. **Respond ONLY with up to {count} different English words**, "
+            "most likely first, one per line, no punctuation, no explanation, no surrounding text. "
+            "Return the words in UPPERCASE only."
+        )
+        user_text = (f"Crossword clue: {clue}\n"
+                     f"Provide up to {count} valid English words, each EXACTLY {length} letters long.")
+    else:
+        system_prompt = (
+            "You are a crossword puzzle solver. **Respond ONLY with a single English word**, "
+            "no punctuation, no explanation, no surrounding text. Return the word in UPPERCASE only."
+        )
+        user_text = f"Crossword clue: {clue}\nProvide a single valid English word EXACTLY {length} letters long."
+    if pattern:
+        user_text += f"\nKnown letters: {pattern} (each ? is an unknown letter)."
 
     for attempt in range(1, retries + 1):
+        if attempt > 1 and not backoff(attempt - 1, deadline):
+            break
         try:
-            body_obj = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": length + 2,   # small allowance
-                "system": system_prompt,
-                "messages": [
-                    {"role": "user", "content": user_text}
-                ],
-            }
-            body_str = json.dumps(body_obj)
-
-            # Pass body string and modelId (do NOT separately pass messages/max_tokens)
-            response = bedrock.invoke_model(body=body_str, modelId=model_id)
-
-            raw_body = response.get("body")
-            if hasattr(raw_body, "read"):
-                resp_text = raw_body.read().decode("utf-8")
-                resp_json = json.loads(resp_text)
-            elif isinstance(raw_body, str):
-                resp_json = json.loads(raw_body)
-            else:
-                # sometimes SDK returns full parsed dict
-                resp_json = response
+            # small allowance
+            resp_json = invoke_claude(system_prompt, user_text, count * (length + 2), usage, model)
 
             extracted = _extract_text_from_response(resp_json)
-            logger.info("Extracted text before filter: '%s'", extracted)
+            logger.debug("Extracted text before filter: '%s'", extracted)
 
-            # Normalize: uppercase and keep letters only
-            answer_alpha = "".join(ch for ch in (extracted or "").upper() if ch.isalpha())
+            # Normalize each line: uppercase and keep letters only
+            lines = extracted.splitlines() if count > 1 else [extracted]
+            words = []
+            for line in lines:
+                word = _normalize_answer(line)
+                if len(word) == length and word not in words and (not pattern or matches_pattern(word, pattern)):
+                    words.append(word)
 
-            if len(answer_alpha) == length:
-                logger.info("Valid answer from Claude: %s", answer_alpha)
-                return answer_alpha
+            if words:
+                logger.debug("Valid answers from Claude: %s", words)
+                return words[:count]
 
-            logger.warning("[Attempt %d] Invalid answer length or empty: '%s' -> '%s'",
-                           attempt, extracted, answer_alpha)
+            logger.warning("[Attempt %d] Invalid answer length or empty: '%s'", attempt, extracted)
 
         except Exception as e:
             logger.error("[Attempt %d] Claude error: %s", attempt, e, exc_info=True)
 
-    return "?" * length
+    return []
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a crossword puzzle solver. You will be given numbered clues, each with the exact "
+    "number of letters required. **Respond ONLY with a JSON array** with one object per clue, "
+    'in the form [{{"id": 1, "answers": ["WORD", ...]}}, ...] with up to {count} different answers '
+    "per clue, most likely first. Answers are single English words in UPPERCASE with exactly the "
+    "requested number of letters. No explanation or surrounding text."
+)
+
+def solve_batch_with_claude(slots, retries: int = 3, usage=None, candidates: int = 1, deadline=None,
+                            model=None) -> list:
+    """
+    Solve several clues with one InvokeModel call per attempt.
+
+    Each item is validated on its own; only the clues that came back missing,
+    malformed or without an answer of the right length are sent again on the
+    next attempt, after an exponential backoff with jitter (skipped, and the
+    retries abandoned, if it would run past `deadline`).
+
+    Returns:
+        list: One list of candidate answers (best first, possibly empty) per slot.
+    """
+    results = [[] for _ in slots]
+    pending = list(range(len(slots)))
+    system_prompt = BATCH_SYSTEM_PROMPT.format(count=candidates)
+
+    for attempt in range(1, retries + 1):
+        if not pending or (attempt > 1 and not backoff(attempt - 1, deadline)):
+            break
+        user_text = "Crossword clues:\n" + "\n".join(
+            f"{n}. {slots[i]['clue']} -- EXACTLY {slots[i]['length']} letters"
+            + (f", matching {slots[i]['pattern']} (? is unknown)" if slots[i].get("pattern") else "")
+            for n, i in enumerate(pending, 1)
+        )
+        # Room for the JSON wrapping around every answer
+        max_tokens = 16 + sum(candidates * (slots[i]["length"] + 4) + 12 for i in pending)
+        try:
+            resp_json = invoke_claude(system_prompt, user_text, max_tokens, usage, model)
+            parsed = _parse_batch_answers(_extract_text_from_response(resp_json), len(pending))
+        except Exception as e:
+            logger.error("[Attempt %d] Claude batch error: %s", attempt, e, exc_info=True)
+            continue
+
+        still_pending = []
+        for n, i in enumerate(pending, 1):
+            words = []
+            pattern = slots[i].get("pattern")
+            for word in parsed.get(n, []):
+                if len(word) == slots[i]["length"] and word not in words and (
+                        not pattern or matches_pattern(word, pattern)):
+                    words.append(word)
+            if words:
+                results[i] = words[:candidates]
+            else:
+                still_pending.append(i)
+        if still_pending:
+            logger.warning("[Attempt %d] %d of %d batched answers invalid, retrying them",
+                           attempt, len(still_pending), len(pending))
+        pending = still_pending
+
+    return results
+
+def cascade_batch(slots, usage=None, candidates: int = 1, deadline=None, start_tier=0) -> list:
+    """
+    solve_batch_with_claude through the model cascade: each tier answers the
+    clues still pending in one batch, and only the clues whose answers are
+    invalid or fail the second-pass check are batched again for the next tier.
+
+    Returns:
+        list: One list of candidate answers (best first, possibly empty) per slot.
+    """
+    results = [[] for _ in slots]
+    first = {i: _cascade_tiers(slot["length"], start_tier)[0] for i, slot in enumerate(slots)}
+    pending = list(range(len(slots)))
+    for tier in range(min(first.values(), default=0), len(model_tiers)):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        model = model_tiers[tier]
+        last = tier == len(model_tiers) - 1
+        batch = [i for i in pending if first[i] <= tier]
+        if not batch:
+            continue
+        found = solve_batch_with_claude([slots[i] for i in batch], 3 if last else cascade_retries, usage,
+                                        candidates, deadline, model)
+        escalated = {}
+        for i, words in zip(batch, found):
+            results[i] = _merge(words, results[i], candidates)
+            reason = None if last else _escalation_reason(words)
+            if reason is None:
+                if usage is not None and words:
+                    usage.record_answer(model)
+            else:
+                escalated[i] = reason
+        if usage is not None:
+            for reason in set(escalated.values()):
+                usage.record_escalation(model, reason, sum(r == reason for r in escalated.values()))
+        pending = [i for i in pending if i not in batch or i in escalated]
+        if not pending:
+            break
+    return results
 
 
 def count_across_length(grid_matrix, r, c) -> int:
@@ -163,7 +752,6 @@ def count_across_length(grid_matrix, r, c) -> int:
     cols = len(grid_matrix[0])
     while c + length < cols and grid_matrix[r][c + length] == 1:
         length += 1
-    logger.info("Across length at (%d,%d): %d", r, c, length)
     return length
 
 
@@ -173,24 +761,15 @@ def count_down_length(grid_matrix, r, c) -> int:
     rows = len(grid_matrix)
     while r + length < rows and grid_matrix[r + length][c] == 1:
         length += 1
-    logger.info("Down length at (%d,%d): %d", r, c, length)
     return length
 
-
-def is_consistent_with_grid(solution_grid, r, c, direction, word) -> bool:
-    """
-    Check if a proposed word fits into the grid without conflicting with existing letters.
-    """
-    if direction == "across":
-        for i, letter in enumerate(word):
-            existing = solution_grid[r][c + i]
-            if existing and existing != letter:
-                logger.info("Conflict at (%d,%d): grid has %s vs %s", r, c + i, existing, letter)
-                return False
-    elif direction == "down":
-        for i, letter in enumerate(word):
-            existing = solution_grid[r + i][c]
-            if existing and existing != letter:
-                logger.info("Conflict at (%d,%d): grid has %s vs %s", r + i, c, existing, letter)
-                return False
-    return True
+if __name__ == "__main__":
+    # Local streaming: python lambda_function.py event.json  ->  NDJSON events on stdout
+    import sys
+    from instrumentation import set_sink
+    # Keep stdout for the events; metric records go to stderr
+    set_sink(lambda record: sys.stderr.write(json.dumps(record) + "\n"))
+    with open(sys.argv[1]) as f:
+        puzzle_event = json.load(f)
+    for progress in solve_puzzle_events(puzzle_event):
+        print(json.dumps(progress), flush=True)
@@ -0,0 +1,46 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: up to `capacity` calls at once, refilled at
+    `rate` tokens per second. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1.0):
+        """Take `tokens` from the bucket, sleeping until enough have accumulated."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+def backoff(attempt, deadline=None, base=0.5, cap=8.0):
+    """
+    Sleep before retry number `attempt` (1 = first retry) using exponential
+    backoff with full jitter: a random delay in [0, min(cap, base * 2**(attempt-1))].
+
+    Returns:
+        bool: False, without sleeping, if the delay would run past `deadline`
+        (a time.monotonic() value), so the caller can give up instead.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        return False
+    time.sleep(delay)
+    return True
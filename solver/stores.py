@@ -0,0 +1 @@
+../shared/stores.py
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Pattern index over known crossword answers, for filling slots without a model call.
+
+Words are grouped by length. For each length L the index holds
+    words: uint8 (n, L)              letters as 0-25
+    masks: uint64 (L, 26, ceil(n/64)) bit k of masks[i, letter] set when word k
+                                      has `letter` at position i
+so matching "A?P?E" is an AND of two bit rows. Words are stored most frequent
+first, so match results come out ranked.
+
+Everything lives in one file (a JSON header followed by 64-byte aligned
+arrays) that is opened with np.memmap, so loading at cold start costs no
+parsing and only the pages touched by a query are read.
+
+Build from generated solutions plus an optional word list (one word per line;
+anything after ";" or whitespace, such as a score, is ignored):
+    python word_index.py words.idx ../dataset/solutions/*_solution.json --wordlist words.txt
+"""
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+import numpy as np
+
+MAGIC = b"XWIDX001"
+PATTERN_CHARS = re.compile(r"[A-Z?]*")
+ALIGN = 64
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def _clean(word):
+    word = word.strip().upper()
+    return word if word.isascii() and word.isalpha() else None
+
+def collect_words(solution_paths=(), wordlist_path=None):
+    """Return words ranked by how often they appear as answers (word list entries after)."""
+    counts = Counter()
+    for path in solution_paths:
+        with open(path) as f:
+            data = json.load(f)
+        for direction in ("across", "down"):
+            for answer in data.get("solutions", {}).get(direction, {}).values():
+                word = _clean(answer or "")
+                if word:
+                    counts[word] += 1
+    ranked = [word for word, _ in counts.most_common()]
+    if wordlist_path:
+        seen = set(ranked)
+        with open(wordlist_path) as f:
+            for line in f:
+                fields = line.replace(";", " ").split()
+                word = _clean(fields[0]) if fields else None
+                if word and word not in seen:
+                    seen.add(word)
+                    ranked.append(word)
+    return ranked
+
+def build_index(words, path):
+    """Write the index file for `words` (already in rank order) to path."""
+    by_length = {}
+    for word in words:
+        by_length.setdefault(len(word), []).append(word)
+
+    header = {"lengths": {}}
+    arrays = []
+    offset = 0
+    for length, group in sorted(by_length.items()):
+        letters = np.frombuffer("".join(group).encode("ascii"), dtype=np.uint8).reshape(len(group), length) - 65
+        blocks = (len(group) + 63) // 64
+        # Bit k of row (i, letter) <=> letters[k, i] == letter
+        hits = np.zeros((length, 26, blocks * 64), dtype=bool)
+        hits[np.arange(length)[None, :], letters, np.arange(len(group))[:, None]] = True
+        masks = np.packbits(hits, axis=-1, bitorder="little").view(np.uint64)
+
+        words_offset = offset
+        masks_offset = _align(words_offset + letters.nbytes)
+        offset = _align(masks_offset + masks.nbytes)
+        header["lengths"][str(length)] = {
+            "count": len(group), "blocks": blocks,
+            "words_offset": words_offset, "masks_offset": masks_offset
+        }
+        arrays.append((words_offset, letters))
+        arrays.append((masks_offset, masks))
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for array_offset, array in arrays:
+            f.seek(data_start + array_offset)
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+class WordIndex:
+    """Read-only, memory-mapped view of an index file written by build_index."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a word index")
+            header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_length))
+        data_start = _align(len(MAGIC) + 8 + header_length)
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+
+        self._words = {}
+        self._masks = {}
+        for key, info in header["lengths"].items():
+            length, count, blocks = int(key), info["count"], info["blocks"]
+            self._words[length] = np.ndarray(
+                (count, length), dtype=np.uint8, buffer=mm, offset=data_start + info["words_offset"])
+            self._masks[length] = np.ndarray(
+                (length, 26, blocks), dtype=np.uint64, buffer=mm, offset=data_start + info["masks_offset"])
+
+    def __len__(self):
+        return sum(len(words) for words in self._words.values())
+
+    def match(self, pattern, limit=None):
+        """
+        Words fitting a pattern such as "A?P?E", most frequent first.
+
+        Returns:
+            list: Up to `limit` matching words; empty for a pattern with anything
+            but A-Z and "?" in it.
+        """
+        pattern = pattern.upper()
+        length = len(pattern)
+        masks = self._masks.get(length)
+        if masks is None or not PATTERN_CHARS.fullmatch(pattern):
+            return []
+        fixed = [(i, ord(ch) - 65) for i, ch in enumerate(pattern) if ch != "?"]
+        if fixed:
+            positions, letters = zip(*fixed)
+            bits = np.bitwise_and.reduce(masks[list(positions), list(letters)], axis=0)
+        else:
+            bits = np.full(masks.shape[-1], np.uint64(0xFFFFFFFFFFFFFFFF))
+        hits = np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder="little"))
+        hits = hits[hits < len(self._words[length])][:limit]
+        return [(row + 65).tobytes().decode("ascii") for row in self._words[length][hits]]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mappable word pattern index.")
+    parser.add_argument("output", help="Index file to write")
+    parser.add_argument("solutions", nargs="*", help="Solution JSON files with solutions.across/down")
+    parser.add_argument("--wordlist", help="Optional word list, one word per line")
+    args = parser.parse_args(argv)
+
+    words = collect_words(args.solutions, args.wordlist)
+    build_index(words, args.output)
+    print(f"Indexed {len(words)} words in {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -105,6 +105,37 @@ resource "aws_lambda_permission" "crossword_solver_apigw" {
   source_arn    = "${aws_api_gateway_rest_api.crossword_api.execution_arn}/*/POST/crossword-solver"
 }
 
+# Single-pass Pipeline Endpoint (/puzzle-pipeline)
+resource "aws_api_gateway_resource" "puzzle_pipeline" {
+  rest_api_id = aws_api_gateway_rest_api.crossword_api.id
+  parent_id   = data.aws_api_gateway_resource.root.id
+  path_part   = "puzzle-pipeline"
+}
+
+resource "aws_api_gateway_method" "puzzle_pipeline_post" {
+  rest_api_id   = aws_api_gateway_rest_api.crossword_api.id
+  resource_id   = aws_api_gateway_resource.puzzle_pipeline.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "puzzle_pipeline_lambda" {
+  rest_api_id             = aws_api_gateway_rest_api.crossword_api.id
+  resource_id             = aws_api_gateway_resource.puzzle_pipeline.id
+  http_method             = aws_api_gateway_method.puzzle_pipeline_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.puzzle_pipeline_function.invoke_arn
+}
+
+resource "aws_lambda_permission" "puzzle_pipeline_apigw" {
+  statement_id  = "AllowAPIGatewayInvokePuzzlePipeline"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.puzzle_pipeline_function.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.crossword_api.execution_arn}/*/POST/puzzle-pipeline"
+}
+
 # === Deployment & Stage ===
 resource "aws_api_gateway_deployment" "crossword_api_deployment" {
   rest_api_id = aws_api_gateway_rest_api.crossword_api.id
@@ -112,6 +143,7 @@ resource "aws_api_gateway_deployment" "crossword_api_deployment" {
     aws_api_gateway_integration.grid_detection_lambda,
     aws_api_gateway_integration.clue_extraction_lambda,
     aws_api_gateway_integration.crossword_solver_lambda,
+    aws_api_gateway_integration.puzzle_pipeline_lambda,
   ]
 }
 
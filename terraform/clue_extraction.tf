@@ -48,6 +48,7 @@ resource "aws_iam_policy" "clue_extraction_textract" {
         Action   = [
           "textract:AnalyzeDocument",
           "textract:DetectDocumentText",
+          "textract:StartDocumentAnalysis",
           "textract:GetDocumentAnalysis"
         ]
         Resource = "*"
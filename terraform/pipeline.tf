@@ -0,0 +1,71 @@
+# IAM Role for the single-pass pipeline Lambda (grid detection + Textract + solver)
+resource "aws_iam_role" "puzzle_pipeline_exec" {
+  name = "puzzle-pipeline-lambda-exec"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+}
+
+# The pipeline needs what each stage Lambda needs
+resource "aws_iam_role_policy_attachment" "puzzle_pipeline_s3_read_attach" {
+  role       = aws_iam_role.puzzle_pipeline_exec.name
+  policy_arn = aws_iam_policy.clue_extraction_s3_read.arn
+}
+
+resource "aws_iam_role_policy_attachment" "puzzle_pipeline_textract_attach" {
+  role       = aws_iam_role.puzzle_pipeline_exec.name
+  policy_arn = aws_iam_policy.clue_extraction_textract.arn
+}
+
+resource "aws_iam_role_policy_attachment" "puzzle_pipeline_bedrock_attach" {
+  role       = aws_iam_role.puzzle_pipeline_exec.name
+  policy_arn = aws_iam_policy.crossword_solver_bedrock_policy.arn
+}
+
+resource "aws_iam_role_policy_attachment" "puzzle_pipeline_logging" {
+  role       = aws_iam_role.puzzle_pipeline_exec.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
+}
+
+# Lambda Function
+resource "aws_lambda_function" "puzzle_pipeline_function" {
+  function_name = "puzzle-pipeline-function"
+  handler       = "lambda_function.lambda_handler"
+  runtime       = "python3.11"
+  role          = aws_iam_role.puzzle_pipeline_exec.arn
+  filename      = "${path.module}/utils/pipeline-function.zip"
+
+  layers = [
+    aws_lambda_layer_version.opencv_numpy.arn,
+    aws_lambda_layer_version.pillow_layer.arn
+  ]
+
+  memory_size      = 2048
+  timeout          = 90
+  source_code_hash = filebase64sha256("${path.module}/utils/pipeline-function.zip")
+
+  environment {
+    variables = {
+      BEDROCK_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+    }
+  }
+
+  tags = {
+    Component = "Puzzle Pipeline Lambda"
+  }
+}
+
+output "puzzle_pipeline_lambda_name" {
+  value       = aws_lambda_function.puzzle_pipeline_function.function_name
+  description = "Lambda function running grid detection, clue extraction and the solver in one pass"
+}
@@ -54,6 +54,11 @@ resource "aws_lambda_function" "crossword_solver_function" {
   role          = aws_iam_role.crossword_solver_exec.arn
   filename      = "${path.module}/utils/solver-function.zip"
 
+  # fill.py and word_index.py use NumPy
+  layers = [
+    aws_lambda_layer_version.opencv_numpy.arn
+  ]
+
   memory_size      = 1024
   timeout          = 60
   source_code_hash = filebase64sha256("${path.module}/utils/solver-function.zip")
@@ -3,11 +3,15 @@ set -e
 
 FUNCTION_DIR="../../clue-extraction"
 OUTPUT_ZIP="clue-extraction-function.zip"
+BUILD_DIR="$(mktemp -d)"
+trap 'rm -rf "$BUILD_DIR"' EXIT
 
 echo "[INFO] Creating $OUTPUT_ZIP..."
 rm -f "$OUTPUT_ZIP"
-cd "$FUNCTION_DIR"
-zip -r "../terraform/utils/$OUTPUT_ZIP" .
-cd ..
+
+# Modules from shared/ are symlinked into the function directory; -L copies
+# the files themselves so the zip does not depend on how zip treats links
+cp -RL "$FUNCTION_DIR"/. "$BUILD_DIR"
+(cd "$BUILD_DIR" && zip -r - .) > "$OUTPUT_ZIP"
 
 echo "[INFO] Lambda function zip created: $OUTPUT_ZIP"
@@ -0,0 +1,26 @@
+#!/bin/bash
+set -e
+
+OUTPUT_ZIP="pipeline-function.zip"
+BUILD_DIR="$(mktemp -d)"
+trap 'rm -rf "$BUILD_DIR"' EXIT
+
+echo "[INFO] Creating $OUTPUT_ZIP..."
+rm -f "$OUTPUT_ZIP"
+
+# Every stage's modules side by side; each stage handler gets its own name
+# so they can sit next to the pipeline's lambda_function.py
+# (modules linked in from shared/, e.g. stores.py, are copied as files)
+for dir in ../../grid-detection/lambda_function ../../clue-extraction ../../solver; do
+  for file in "$dir"/*.py; do
+    [ "$(basename "$file")" = "lambda_function.py" ] || cp "$file" "$BUILD_DIR"
+  done
+done
+cp ../../grid-detection/lambda_function/lambda_function.py "$BUILD_DIR/grid_detection_handler.py"
+cp ../../clue-extraction/lambda_function.py "$BUILD_DIR/clue_extraction_handler.py"
+cp ../../solver/lambda_function.py "$BUILD_DIR/solver_handler.py"
+cp ../../pipeline/lambda_function.py "$BUILD_DIR/lambda_function.py"
+
+(cd "$BUILD_DIR" && zip -r - .) > "$OUTPUT_ZIP"
+
+echo "[INFO] Lambda function zip created: $OUTPUT_ZIP"
@@ -0,0 +1,23 @@
+"""Load the Lambda modules under test from their own directories."""
+import importlib.util
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+def load_module(name, directory, filename=None):
+    """
+    Import REPO_ROOT/directory/filename (default name.py) as `name`, with the
+    directory on sys.path so its sibling modules import as they do in the zip.
+    Every Lambda has a lambda_function.py, so handlers get distinct names.
+    """
+    directory = str(REPO_ROOT / directory)
+    if directory not in sys.path:
+        sys.path.append(directory)
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, Path(directory) / (filename or f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from helpers import load_module
+
+pytest.importorskip("boto3")
+handler = load_module("clue_extraction_handler", "clue-extraction", "lambda_function.py")
+document_analysis = load_module("document_analysis", "clue-extraction")
+
+BUCKET, KEY = "puzzles", "book.pdf"
+
+def line(text, left, top, page):
+    return {"BlockType": "LINE", "Text": text, "Page": page,
+            "Geometry": {"BoundingBox": {"Left": left, "Top": top, "Width": 0.3, "Height": 0.02}}}
+
+def page_blocks(page):
+    return [
+        line("ACROSS", 0.05, 0.10, page),
+        line(f"1 Across clue on page {page} (5)", 0.05, 0.15, page),
+        line("DOWN", 0.55, 0.10, page),
+        line(f"2 Down clue on page {page} (4)", 0.55, 0.15, page),
+    ]
+
+BLOCKS = page_blocks(1) + page_blocks(2)
+
+class NoS3:
+    """Fails the test on any S3 call; the stand-in path must stay offline."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected S3 call: {name}")
+
+class Context:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+@pytest.fixture
+def textract(monkeypatch):
+    client = document_analysis.LocalTextract({(BUCKET, KEY): BLOCKS}, polls_in_progress=1)
+    monkeypatch.setattr(handler, "_textract", client)
+    monkeypatch.setattr(handler, "_s3", NoS3())
+    monkeypatch.setattr(handler, "deadline_margin_ms", 0)
+    # Small result pages so the NextToken loop runs too
+    monkeypatch.setattr(document_analysis, "PAGE_SIZE", 3)
+    return client
+
+def test_pending_job_returns_202_and_resumes(textract):
+    event = {"bucket": BUCKET, "key": KEY, "use_cache": False}
+
+    # No time left to wait: the running job is handed back to the caller
+    response = handler.lambda_handler(event, Context(0))
+    assert response["statusCode"] == 202
+    body = json.loads(response["body"])
+    assert body["status"] == "IN_PROGRESS"
+
+    response = handler.lambda_handler({**event, "job_id": body["job_id"]}, Context(60000))
+    assert response["statusCode"] == 200
+    pages = json.loads(response["body"])["pages"]
+    assert [page["page"] for page in pages] == [1, 2]
+    assert pages[1]["across"][0]["text"] == "Across clue on page 2"
+    assert pages[1]["down"][0]["number"] == 2
+
+    # The resumed call picked up the same job instead of starting another
+    assert [call for call in textract.calls if call[0] == "start"] == [("start", body["job_id"])]
+
+def test_stand_in_skips_the_s3_cache_lookup(textract):
+    pages = list(handler.extract_document_clues(BUCKET, KEY, textract=textract, poll_interval=0))
+    assert len(pages) == 2
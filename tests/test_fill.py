@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from helpers import REPO_ROOT, load_module
+
+puz = pytest.importorskip("puz")
+fill = load_module("fill", "solver")
+
+# Full-size daily puzzles (15x15, about 78 slots)
+PUZZLES = ["raw_data/daily/1993/11/Nov2393.puz", "raw_data/daily/1993/11/Nov2593.puz"]
+
+def load_puzzle(path):
+    """Grid, slots and answers of a .puz file."""
+    p = puz.read(str(REPO_ROOT / path))
+    grid = [[0 if p.solution[r * p.width + c] == "." else 1 for c in range(p.width)] for r in range(p.height)]
+    slots = []
+    for direction, (dr, dc) in (("across", (0, 1)), ("down", (1, 0))):
+        for r in range(p.height):
+            for c in range(p.width):
+                if not grid[r][c] or (r - dr >= 0 and c - dc >= 0 and grid[r - dr][c - dc]):
+                    continue
+                length = 0
+                while r + dr * length < p.height and c + dc * length < p.width and grid[r + dr * length][c + dc * length]:
+                    length += 1
+                if length > 1:
+                    slots.append({"direction": direction, "row": r, "col": c, "length": length})
+    answers = ["".join(p.solution[r * p.width + c] for r, c in fill.slot_cells(slot)) for slot in slots]
+    return grid, slots, answers
+
+def model_candidates(answers, seed, hit_rate=0.75, decoys=4):
+    """
+    Candidate lists like the model's: real words of the right length, with the
+    answer among the top three for hit_rate of the slots and missing otherwise.
+    """
+    rng = random.Random(seed)
+    by_length = {}
+    for word in answers:
+        by_length.setdefault(len(word), []).append(word)
+    candidates = []
+    for word in answers:
+        pool = [w for w in by_length[len(word)] if w != word]
+        words = rng.sample(pool, min(decoys, len(pool)))
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(3), word)
+        candidates.append(words)
+    return candidates
+
+def crossings_agree(slots, answers):
+    cells = {}
+    for slot, answer in zip(slots, answers):
+        if answer is not None:
+            for cell, letter in zip(fill.slot_cells(slot), answer):
+                if cells.setdefault(cell, letter) != letter:
+                    return False
+    return True
+
+@pytest.mark.parametrize("path", PUZZLES)
+def test_full_grid_with_every_answer_is_solved(path):
+    grid, slots, answers = load_puzzle(path)
+    _, chosen, stats = fill.fill_grid(grid, slots, model_candidates(answers, seed=0, hit_rate=1.0))
+    assert chosen == answers
+    assert stats["open_cells"] == 0
+
+@pytest.mark.parametrize("path", PUZZLES)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_full_grid_with_missing_answers_fills_most_slots(path, seed):
+    grid, slots, answers = load_puzzle(path)
+    candidates = model_candidates(answers, seed)
+    answerable = sum(word in words for word, words in zip(answers, candidates))
+
+    _, chosen, stats = fill.fill_grid(grid, slots, candidates)
+
+    assert crossings_agree(slots, chosen)
+    # Exhaustive branching on conflicts spent the budget early and got as low as 70%
+    assert stats["filled_slots"] >= 0.75 * answerable
+
+def test_fill_does_not_depend_on_the_budget_running_out():
+    grid, slots, answers = load_puzzle(PUZZLES[0])
+    candidates = model_candidates(answers, seed=1)
+
+    heuristic = fill.GridFill(slots, candidates, max_discrepancies=0).solve()
+    starved = fill.GridFill(slots, candidates, max_nodes=1).solve()
+    full = fill.GridFill(slots, candidates).solve()
+
+    # The first pass always completes and is kept; more budget only improves on it
+    assert starved == heuristic
+    assert crossings_agree(slots, full)
+    assert sum(a is not None for a in full) >= sum(a is not None for a in heuristic)
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from helpers import load_module
+
+jobs = load_module("jobs", "pipeline")
+
+def counting_handler(seconds=0.0):
+    """A handler that sleeps, then returns how many times it has been called."""
+    calls = []
+    lock = threading.Lock()
+
+    def handler(payload, report):
+        with lock:
+            calls.append(payload)
+        report({"event": "stage", "stage": "sleep"})
+        time.sleep(seconds)
+        return {"calls": len(calls)}
+    return handler, calls
+
+def test_memory_runner_runs_a_job():
+    handler, calls = counting_handler()
+    with jobs.JobRunner(jobs.MemoryJobStore(), jobs.MemoryQueue(), {"count": handler}, workers=2) as runner:
+        record = runner.wait(runner.submit({"n": 1}, kind="count"), timeout=5)
+    assert record["status"] == "succeeded"
+    assert record["result"] == {"calls": 1}
+    assert record["attempts"] == 1
+    assert record["progress"]["stage"] == "sleep"
+
+def test_lease_is_extended_while_a_long_job_runs(tmp_path):
+    db = str(tmp_path / "jobs.db")
+    # The job runs for several visibility timeouts; an idle second worker
+    # would pick it up again if the lease lapsed
+    handler, calls = counting_handler(seconds=1.0)
+    queue = jobs.SQLiteQueue(db, visibility_timeout=0.3, poll_interval=0.01)
+    with jobs.JobRunner(jobs.SQLiteJobStore(db), queue, {"count": handler}, workers=2) as runner:
+        record = runner.wait(runner.submit({"n": 1}, kind="count"), timeout=10)
+    assert record["status"] == "succeeded"
+    assert len(calls) == 1
+    assert record["attempts"] == 1
+
+def test_unacked_job_is_redelivered(tmp_path):
+    queue = jobs.SQLiteQueue(str(tmp_path / "jobs.db"), visibility_timeout=0.2, poll_interval=0.01)
+    queue.put("job-1")
+    # Received by a worker that then dies without acking
+    assert queue.get(timeout=0) == "job-1"
+    assert queue.get(timeout=0) is None
+    assert queue.get(timeout=2) == "job-1"
+    queue.ack("job-1")
+    time.sleep(0.3)
+    assert queue.get(timeout=0) is None
+
+def test_job_fails_after_max_attempts(tmp_path):
+    db = str(tmp_path / "jobs.db")
+    handler, calls = counting_handler()
+    store = jobs.SQLiteJobStore(db)
+    queue = jobs.SQLiteQueue(db, visibility_timeout=0.2, poll_interval=0.01)
+    runner = jobs.JobRunner(store, queue, {"count": handler}, max_attempts=2)
+    job_id = runner.submit({"n": 1}, kind="count")
+    # Two deliveries whose workers crashed after marking the job running
+    for attempt in (1, 2):
+        assert queue.get(timeout=2) == job_id
+        store.update(job_id, status="running", attempts=attempt)
+
+    runner.run_job(queue.get(timeout=2))
+    record = runner.get(job_id)
+    assert record["status"] == "failed"
+    assert record["error"] == "Gave up after 2 attempts"
+    assert calls == []
+    # Acked, so it is not delivered again
+    time.sleep(0.3)
+    assert queue.get(timeout=0) is None